@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+class ApiConfig(AppConfig):
+    name = 'api'
+
+    def ready(self):
+        # Connect signal handlers
+        from api import signals
@@ -0,0 +1,187 @@
+"""
+Audit trail of account changes and logins.
+
+`record()` only appends an `AuditEvent` to a per-process buffer. The buffer
+is written with a single `bulk_create` once it holds `BATCH_SIZE` events or
+its oldest event is `FLUSH_INTERVAL` seconds old, whichever comes first, by
+the next `record()` or by a background thread for idle workers. What is left
+is written when the process exits.
+
+Events are flushed outside of transactions only, so that a request rolling
+back cannot take other requests' events with it. Queries see an event once
+it has been flushed, up to `FLUSH_INTERVAL` seconds after it was recorded.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+try:
+    import uwsgi
+except ImportError:
+    uwsgi = None
+
+DEFAULTS = {
+    'ENABLED': True,
+    # Events written at once
+    'BATCH_SIZE': 100,
+    # Seconds an event may wait in the buffer
+    'FLUSH_INTERVAL': 5,
+    # Flush from a background thread too, when no event comes to do it.
+    # Under uwsgi, the thread only runs with --enable-threads
+    'FLUSH_THREAD': True,
+}
+
+CREATE = 'create'
+UPDATE = 'update'
+PASSWORD_CHANGE = 'password_change'
+LOGIN = 'login'
+# One event for every user a bulk update changed, listed in `user_ids`
+BULK_UPDATE = 'bulk_update'
+
+ACTIONS = (
+    (CREATE, "Create"),
+    (UPDATE, "Update"),
+    (PASSWORD_CHANGE, "Password change"),
+    (LOGIN, "Login"),
+    (BULK_UPDATE, "Bulk update"),
+)
+
+logger = logging.getLogger('api.audit')
+
+class AuditLog(object):
+    """
+    Per-process buffer of audit events waiting to be written.
+    """
+
+    def __init__(self, options=None):
+        self._lock = threading.Lock()
+        self.configure(options)
+
+    def configure(self, options=None):
+        if options is None:
+            options = getattr(settings, 'API_AUDIT', {})
+        config = dict(DEFAULTS, **options)
+        self.enabled = config['ENABLED']
+        self.batch_size = config['BATCH_SIZE']
+        self.flush_interval = config['FLUSH_INTERVAL']
+        self.flush_thread = config['FLUSH_THREAD']
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._events = []
+            self._oldest = None
+            # A forked worker starts with its own buffer and thread
+            self._pid = os.getpid()
+            self._thread = None
+
+    def record(self, action, user_id, actor_id=None, changes=None, remote_addr=None, user_ids=None):
+        from api.models import AuditEvent
+
+        if not self.enabled:
+            return
+        if self._pid != os.getpid():
+            self.clear()
+        event = AuditEvent(
+            action=action, user_id=user_id, actor_id=actor_id,
+            changes=json.dumps(sorted(changes or ())), remote_addr=remote_addr,
+            user_ids=json.dumps(sorted(user_ids or ())),
+        )
+        with self._lock:
+            self._events.append(event)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            if self.flush_thread and self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='audit-flush')
+                self._thread.daemon = True
+                self._thread.start()
+        if self.is_due():
+            self.flush()
+
+    def is_due(self):
+        oldest = self._oldest
+        return oldest is not None and (
+            len(self._events) >= self.batch_size or time.monotonic() - oldest >= self.flush_interval)
+
+    def flush(self):
+        """
+        Write the buffered events, unless this thread is inside a transaction.
+        Returns the number of events written.
+        """
+        from api.models import AuditEvent
+
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return 0
+        with self._lock:
+            events, self._events, self._oldest = self._events, [], None
+        if not events:
+            return 0
+        try:
+            AuditEvent.objects.bulk_create(events)
+        except Exception:
+            logger.exception('Lost %d audit events', len(events))
+            return 0
+        return len(events)
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            if self._pid != os.getpid():
+                return
+            if self.is_due():
+                self.flush()
+                # Connections are per thread, don't keep this one open
+                connections.close_all()
+
+    def __len__(self):
+        return len(self._events)
+
+audit_log = AuditLog()
+
+def record(action, user_id, actor_id=None, changes=None, request=None, user_ids=None):
+    """
+    Buffer an event about the user `user_id`, or the users `user_ids`, done
+    by the user `actor_id`. `changes` names the fields changed.
+    """
+    remote_addr = request.META.get('REMOTE_ADDR') if request is not None else None
+    audit_log.record(action, user_id, actor_id, changes, remote_addr, user_ids)
+
+def query_events(user_id=None, actor_id=None, actions=None, since=None, until=None):
+    """
+    Return the flushed events matching every argument given, newest first.
+    """
+    from api.models import AuditEvent
+
+    events = AuditEvent.objects.all()
+    if user_id is not None:
+        events = events.filter(user_id=user_id)
+    if actor_id is not None:
+        events = events.filter(actor_id=actor_id)
+    if actions:
+        events = events.filter(action__in=actions)
+    if since is not None:
+        events = events.filter(timestamp__gte=since)
+    if until is not None:
+        events = events.filter(timestamp__lt=until)
+    return events.order_by('-timestamp', '-id')
+
+def flush_on_exit():
+    audit_log.flush()
+
+atexit.register(flush_on_exit)
+if uwsgi is not None:
+    # uwsgi may skip the interpreter's exit handlers when a worker shuts down
+    previous_atexit = getattr(uwsgi, 'atexit', None)
+
+    def uwsgi_atexit():
+        flush_on_exit()
+        if previous_atexit is not None:
+            previous_atexit()
+
+    uwsgi.atexit = uwsgi_atexit
@@ -0,0 +1,100 @@
+import jwt
+from django.utils.translation import ugettext as _
+from rest_framework import exceptions
+from rest_framework_jwt.authentication import JSONWebTokenAuthentication
+from rest_framework_jwt.settings import api_settings
+from api.instrumentation import instrumented
+from api.routers import use_primary
+from api.tokens import TokenRevoked, get_claims_option
+from api.user_cache import user_cache, get_user_version
+
+jwt_decode_handler = api_settings.JWT_DECODE_HANDLER
+jwt_get_username_from_payload = api_settings.JWT_PAYLOAD_GET_USERNAME_HANDLER
+
+class ClaimsUser(object):
+    """
+    The user a JWT was issued to, as far as its claims describe it.
+
+    Enough for permission checks, which only need the pk and the staff flag.
+    Views that need the full row ask the request's `AuthContext` for it.
+    """
+
+    def __init__(self, payload, authenticator):
+        self.payload = payload
+        self.authenticator = authenticator
+        self.pk = self.id = payload['user_id']
+        self.username = jwt_get_username_from_payload(payload)
+        self.is_staff = payload['is_staff']
+        self.is_active = payload['is_active']
+
+    def get_username(self):
+        return self.username
+
+    def is_anonymous(self):
+        return False
+
+    def is_authenticated(self):
+        return True
+
+    def load(self):
+        return self.authenticator.load_user(self.payload)
+
+    def __str__(self):
+        return self.username
+
+class CachedJSONWebTokenAuthentication(JSONWebTokenAuthentication):
+    """
+    JWT authentication that keeps resolved users in a per-worker cache, so
+    most requests do not need to look the user up in the database.
+
+    With `API_JWT_CLAIMS` enabled, tokens carrying claims are authorized from
+    the claims alone and the user is only loaded when a view needs it.
+    """
+
+    @instrumented('auth')
+    def authenticate(self, request):
+        jwt_value = self.get_jwt_value(request)
+        if jwt_value is None:
+            return None
+
+        try:
+            payload = jwt_decode_handler(jwt_value)
+        except jwt.ExpiredSignature:
+            msg = _('Signature has expired.')
+            raise exceptions.AuthenticationFailed(msg)
+        except TokenRevoked:
+            msg = _('Token has been revoked.')
+            raise exceptions.AuthenticationFailed(msg)
+        except jwt.DecodeError:
+            msg = _('Error decoding signature.')
+            raise exceptions.AuthenticationFailed(msg)
+        except jwt.InvalidTokenError:
+            raise exceptions.AuthenticationFailed()
+
+        user = self.authenticate_credentials(payload)
+
+        return (user, jwt_value)
+
+    def authenticate_credentials(self, payload):
+        if get_claims_option('ENABLED') and 'is_staff' in payload:
+            if not payload['is_active']:
+                msg = _('User account is disabled.')
+                raise exceptions.AuthenticationFailed(msg)
+            return ClaimsUser(payload, self)
+        return self.load_user(payload)
+
+    def load_user(self, payload):
+        if not user_cache.enabled:
+            return super(CachedJSONWebTokenAuthentication, self).authenticate_credentials(payload)
+
+        username = jwt_get_username_from_payload(payload)
+        user = user_cache.get(username) if username else None
+        if user is None:
+            user_id = payload.get('user_id')
+            version = get_user_version(user_id) if user_id is not None else None
+            # A row read from a replica could predate the version
+            with use_primary():
+                user = super(CachedJSONWebTokenAuthentication, self).authenticate_credentials(payload)
+            if version is not None and user.pk == user_id:
+                user_cache.set(username, user, version)
+        return user
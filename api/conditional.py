@@ -0,0 +1,29 @@
+import hashlib
+import json
+
+from django.utils.http import parse_etags, quote_etag
+from rest_framework.utils import encoders
+
+def representation_etag(data, media_type=None):
+    """
+    Return a strong ETag for a serialized representation.
+
+    The tag is derived from the data itself, so any write that changes what a
+    client would see changes the tag, and writes that do not (a password
+    change) leave cached copies valid.
+    """
+    content = json.dumps(data, cls=encoders.JSONEncoder, separators=(',', ':'))
+    digest = hashlib.sha1()
+    digest.update((media_type or '').encode('utf-8'))
+    digest.update(content.encode('utf-8'))
+    return quote_etag(digest.hexdigest())
+
+def etag_matches(request, etag):
+    """
+    Return whether the request's `If-None-Match` header matches `etag`.
+    """
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return '*' in etags or etag.strip('"') in etags
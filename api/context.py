@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+
+UserModel = get_user_model()
+
+CURRENT_USER_PK = 'current'
+
+class AuthContext(object):
+    """
+    The authenticated identity of a single API request.
+
+    Built once from the DRF request after authentication has run, and shared
+    by the viewset, the permission classes and the serializers so that the
+    token is only verified and the user only loaded once per request.
+    """
+
+    def __init__(self, user, auth):
+        self.user = user
+        self.auth = auth
+
+    @property
+    def is_authenticated(self):
+        return bool(self.user and self.user.is_authenticated())
+
+    @property
+    def is_staff(self):
+        return bool(self.user and self.user.is_staff)
+
+    def is_self(self, obj):
+        return (self.is_authenticated and isinstance(obj, UserModel) and
+                obj.pk == self.user.pk)
+
+    def load_user(self):
+        """
+        Return the authenticated user's full row, loading it if the request
+        was authorized from the token's claims alone.
+        """
+        from api.authentication import ClaimsUser
+
+        if isinstance(self.user, ClaimsUser):
+            self.user = self.user.load()
+        return self.user
+
+    def resolve_pk(self, pk):
+        """
+        Translate the `current` placeholder into the authenticated user's pk.
+        """
+        if pk == CURRENT_USER_PK and self.is_authenticated:
+            return self.user.pk
+        return pk
+
+def get_auth_context(request):
+    """
+    Return the `AuthContext` for a DRF request, creating it on first use.
+
+    The context is stored on the underlying Django request so that anything
+    holding either request object sees the same identity.
+    """
+    http_request = getattr(request, '_request', request)
+    context = getattr(http_request, 'auth_context', None)
+    if context is None:
+        context = AuthContext(request.user, request.auth)
+        http_request.auth_context = context
+    return context
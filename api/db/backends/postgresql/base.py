@@ -0,0 +1,101 @@
+"""
+PostgreSQL backend with connection health checks and an optional pool.
+
+Configured through two extra keys of the database settings:
+
+* `CONN_HEALTH_CHECKS`: when true, a connection reused from an earlier
+  request, kept open or taken from the pool, is pinged (`SELECT 1`) before
+  its first use in a new request and replaced if it is dead, e.g. after a
+  failover, instead of failing the request.
+* `POOL`: `{'MIN_SIZE': n, 'MAX_SIZE': m}` keeps up to `MAX_SIZE` open
+  connections per process. Closing a connection hands it back to the pool
+  instead of disconnecting. Leave `CONN_MAX_AGE` at 0 when pooling, the pool
+  takes care of reuse. Every thread of the process holds a connection of its
+  own, background ones such as the audit log's flush thread included, so
+  `MAX_SIZE` must cover them all or `getconn()` raises `PoolError`.
+"""
+import os
+import threading
+
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.postgresql_psycopg2.base import DatabaseWrapper as PostgreSQLDatabaseWrapper
+import psycopg2 as Database
+from psycopg2 import pool
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+class DatabaseWrapper(PostgreSQLDatabaseWrapper):
+    health_check_pending = False
+
+    def get_pool(self, conn_params):
+        options = self.settings_dict.get('POOL')
+        if not options or not options.get('MAX_SIZE'):
+            return None
+        # Pools must never be shared with a forked child
+        key = (self.alias, os.getpid())
+        with _pools_lock:
+            if key not in _pools:
+                _pools[key] = pool.ThreadedConnectionPool(
+                    options.get('MIN_SIZE', 0), options['MAX_SIZE'], **conn_params
+                )
+            return _pools[key]
+
+    def get_new_connection(self, conn_params):
+        connection_pool = self.get_pool(conn_params)
+        if connection_pool is None:
+            return super(DatabaseWrapper, self).get_new_connection(conn_params)
+
+        # `closed` only tells what the client did: a connection the server
+        # dropped, e.g. in a failover, has to be pinged to find out. The pool
+        # keeps fewer idle connections than MAX_SIZE, so after that many
+        # dead ones it opens a new one.
+        health_checks = self.settings_dict.get('CONN_HEALTH_CHECKS')
+        for attempt in range(self.settings_dict['POOL']['MAX_SIZE']):
+            connection = connection_pool.getconn()
+            if not connection.closed and (not health_checks or self.ping(connection)):
+                break
+            connection_pool.putconn(connection, close=True)
+        else:
+            connection = connection_pool.getconn()
+        options = self.settings_dict['OPTIONS']
+        self.isolation_level = options.get('isolation_level', connection.isolation_level)
+        if self.isolation_level != connection.isolation_level:
+            connection.set_session(isolation_level=self.isolation_level)
+        return connection
+
+    def ping(self, connection):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            if not connection.autocommit:
+                connection.rollback()
+        except Database.Error:
+            return False
+        return True
+
+    def ensure_connection(self):
+        if self.health_check_pending:
+            self.health_check_pending = False
+            if self.connection is not None and not self.in_atomic_block and not self.is_usable():
+                self.close()
+        super(DatabaseWrapper, self).ensure_connection()
+
+    def _close(self):
+        if self.connection is None:
+            return
+        connection_pool = self.get_pool(self.get_connection_params())
+        if connection_pool is None:
+            return super(DatabaseWrapper, self)._close()
+        with self.wrap_database_errors:
+            # The pool rolls back anything left open and discards connections
+            # that are broken or closed.
+            connection_pool.putconn(self.connection, close=self.connection.closed != 0)
+
+def schedule_health_checks(**kwargs):
+    for connection in connections.all():
+        if isinstance(connection, DatabaseWrapper) and connection.settings_dict.get('CONN_HEALTH_CHECKS'):
+            connection.health_check_pending = True
+
+request_started.connect(schedule_health_checks, dispatch_uid='api.db.schedule_health_checks')
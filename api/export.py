@@ -0,0 +1,87 @@
+import json
+from collections import OrderedDict
+
+import msgpack
+from django.conf import settings
+from rest_framework.settings import api_settings
+from rest_framework.utils import encoders
+
+DEFAULTS = {
+    # Rows fetched per keyset query while exporting
+    'CHUNK_SIZE': 2000,
+}
+
+def get_chunk_size():
+    return dict(DEFAULTS, **getattr(settings, 'API_USER_EXPORT', {}))['CHUNK_SIZE']
+
+def iter_rows(queryset, fields, chunk_size):
+    """
+    Yield `values_list` rows for `fields` in primary key order.
+
+    The queryset is walked in keyset chunks (`pk > last ORDER BY pk`), each
+    read through `.iterator()`, so neither Django nor the database driver ever
+    holds more than one chunk in memory.
+    """
+    last_pk = None
+    while True:
+        chunk = queryset.order_by('pk')
+        if last_pk is not None:
+            chunk = chunk.filter(pk__gt=last_pk)
+        count = 0
+        for row in chunk.values_list('pk', *fields)[:chunk_size].iterator():
+            count += 1
+            last_pk = row[0]
+            yield row[1:]
+        if count < chunk_size:
+            return
+
+def stream_json(queryset, fields, ndjson=False, chunk_size=None):
+    """
+    Encode a queryset as a JSON array, or as NDJSON, one chunk at a time.
+    """
+    if chunk_size is None:
+        chunk_size = get_chunk_size()
+    encoder = json.JSONEncoder(ensure_ascii=not api_settings.UNICODE_JSON, separators=(',', ':'))
+    separator = '\n' if ndjson else ','
+
+    if not ndjson:
+        yield b'['
+    buffer = []
+    written = False
+    for row in iter_rows(queryset, fields, chunk_size):
+        buffer.append(encoder.encode(OrderedDict(zip(fields, row))))
+        if len(buffer) >= chunk_size:
+            yield _join(buffer, separator, ndjson, written)
+            buffer = []
+            written = True
+    if buffer:
+        yield _join(buffer, separator, ndjson, written)
+    if not ndjson:
+        yield b']'
+
+def stream_msgpack(queryset, fields, chunk_size=None):
+    """
+    Encode a queryset as a stream of MessagePack maps, one per row, which
+    clients read with `msgpack.Unpacker`. Unlike an array, the stream needs
+    no count up front.
+    """
+    if chunk_size is None:
+        chunk_size = get_chunk_size()
+    packer = msgpack.Packer(use_bin_type=True, default=encoders.JSONEncoder().default)
+
+    buffer = []
+    for row in iter_rows(queryset, fields, chunk_size):
+        buffer.append(packer.pack(OrderedDict(zip(fields, row))))
+        if len(buffer) >= chunk_size:
+            yield b''.join(buffer)
+            buffer = []
+    if buffer:
+        yield b''.join(buffer)
+
+def _join(lines, separator, ndjson, written):
+    data = separator.join(lines)
+    if ndjson:
+        data += separator
+    elif written:
+        data = separator + data
+    return data.encode('utf-8')
@@ -0,0 +1,123 @@
+import datetime
+import sys
+
+from django.db import connections
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+BOOLEAN_VALUES = {
+    'true': True, '1': True, 'yes': True,
+    'false': False, '0': False, 'no': False,
+}
+
+def parse_boolean(param, value):
+    try:
+        return BOOLEAN_VALUES[value.lower()]
+    except KeyError:
+        raise ValidationError({param: "Expected true or false."})
+
+def parse_moment(param, value):
+    """
+    Parse an ISO 8601 date or datetime, taking dates as midnight and naive
+    values as being in the current time zone.
+    """
+    try:
+        moment = parse_datetime(value)
+        if moment is None:
+            date = parse_date(value)
+            if date is not None:
+                moment = datetime.datetime.combine(date, datetime.time())
+    except ValueError:
+        moment = None
+    if moment is None:
+        raise ValidationError({param: "Expected an ISO 8601 date or datetime."})
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+def prefix_upper_bound(prefix):
+    """
+    Return the smallest string greater than every string starting with `prefix`,
+    or None if there is none, `prefix` being made of the last code point only.
+    """
+    prefix = prefix.rstrip(chr(sys.maxunicode))
+    if not prefix:
+        return None
+    code = ord(prefix[-1]) + 1
+    if 0xD800 <= code <= 0xDFFF:
+        # Surrogates cannot be encoded, no string holds one
+        code = 0xE000
+    return prefix[:-1] + chr(code)
+
+class UserFilterBackend(BaseFilterBackend):
+    """
+    Filter the user list, each parameter matching an index added by the
+    `0004_user_search_indexes` migration:
+
+    * `username`: case-insensitive username prefix
+    * `email_domain`: case-insensitive email domain
+    * `is_active`: `true` or `false`
+    * `joined_after`, `joined_before`: `date_joined` range, the start included
+    * `search`: case-insensitive substring of the username or email
+
+    Postgres answers the prefix with a `text_pattern_ops` index on
+    `lower(username)`, and the domain and search with trigram indexes. SQLite
+    has no trigram indexes, so the prefix becomes a range over an index on
+    `lower(username)`, the domain an equality on an index over the part of
+    the email from the `@`, and search a scan.
+    """
+    parameters = ('username', 'email_domain', 'is_active', 'joined_after', 'joined_before', 'search')
+
+    def filter_queryset(self, request, queryset, view):
+        return self.filter_params(queryset, request.query_params)
+
+    def filter_params(self, queryset, params):
+        """
+        Filter `queryset` by the parameters in the mapping `params`.
+        """
+        vendor = connections[queryset.db].vendor
+
+        username = params.get('username')
+        if username:
+            queryset = queryset.annotate(username_lower=Lower('username'))
+            prefix = username.lower()
+            upper_bound = prefix_upper_bound(prefix)
+            if vendor == 'sqlite' and upper_bound is not None:
+                queryset = queryset.filter(username_lower__gte=prefix, username_lower__lt=upper_bound)
+            else:
+                queryset = queryset.filter(username_lower__startswith=prefix)
+
+        domain = params.get('email_domain')
+        if domain:
+            suffix = '@' + domain.lstrip('@').lower()
+            if vendor == 'sqlite':
+                # Must match the indexed expression exactly
+                queryset = queryset.extra(where=["lower(substr(email, instr(email, '@'))) = %s"],
+                                          params=[suffix])
+            else:
+                queryset = queryset.annotate(email_lower=Lower('email')).filter(email_lower__endswith=suffix)
+
+        is_active = params.get('is_active')
+        if is_active:
+            queryset = queryset.filter(is_active=parse_boolean('is_active', is_active))
+
+        joined_after = params.get('joined_after')
+        if joined_after:
+            queryset = queryset.filter(date_joined__gte=parse_moment('joined_after', joined_after))
+
+        joined_before = params.get('joined_before')
+        if joined_before:
+            queryset = queryset.filter(date_joined__lt=parse_moment('joined_before', joined_before))
+
+        search = params.get('search')
+        if search:
+            search = search.lower()
+            queryset = queryset.annotate(
+                search_username=Lower('username'), search_email=Lower('email')
+            ).filter(Q(search_username__contains=search) | Q(search_email__contains=search))
+
+        return queryset
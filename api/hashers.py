@@ -0,0 +1,69 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, BCryptSHA256PasswordHasher, make_password
+from api.instrumentation import instrumented
+
+DEFAULTS = {
+    'PBKDF2_ITERATIONS': PBKDF2PasswordHasher.iterations,
+    'BCRYPT_ROUNDS': BCryptSHA256PasswordHasher.rounds,
+}
+
+def get_hashing_option(name):
+    return getattr(settings, 'API_PASSWORD_HASHING', {}).get(name, DEFAULTS[name])
+
+class TunablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2 with its iteration count taken from `API_PASSWORD_HASHING`.
+
+    Keeps the `pbkdf2_sha256` algorithm name, so existing hashes verify as
+    before and any hash made with a different count is re-hashed on the next
+    successful login.
+    """
+
+    @property
+    def iterations(self):
+        return get_hashing_option('PBKDF2_ITERATIONS')
+
+    # verify() goes through encode(), so this times both
+    @instrumented('hash')
+    def encode(self, password, salt, iterations=None):
+        return super(TunablePBKDF2PasswordHasher, self).encode(password, salt, iterations)
+
+class TunableBCryptSHA256PasswordHasher(BCryptSHA256PasswordHasher):
+    """
+    bcrypt with its cost taken from `API_PASSWORD_HASHING`. Needs `bcrypt`.
+    """
+
+    @property
+    def rounds(self):
+        return get_hashing_option('BCRYPT_ROUNDS')
+
+    def must_update(self, encoded):
+        # bcrypt_sha256$$2b$<rounds>$<salt and hash>
+        rounds = encoded.split('$')[3]
+        return int(rounds) != self.rounds
+
+    @instrumented('hash')
+    def encode(self, password, salt):
+        return super(TunableBCryptSHA256PasswordHasher, self).encode(password, salt)
+
+    @instrumented('hash')
+    def verify(self, password, encoded):
+        return super(TunableBCryptSHA256PasswordHasher, self).verify(password, encoded)
+
+def hash_passwords(passwords, workers=1):
+    """
+    Hash many passwords with the preferred hasher, spread over `workers`
+    threads. PBKDF2 and bcrypt release the GIL while hashing, so the threads
+    run in parallel.
+    """
+    if workers <= 1 or len(passwords) <= 1:
+        return [make_password(password) for password in passwords]
+    return _hash_in_parallel(passwords, workers)
+
+@instrumented('hash')
+def _hash_in_parallel(passwords, workers):
+    # The pool threads do not see the request's timings, so time the batch here
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(make_password, passwords))
@@ -0,0 +1,115 @@
+"""
+Per-request performance instrumentation.
+
+`ServerTimingMiddleware` starts a `RequestTimings` recorder for a sample of
+requests. While it is active, code decorated with `instrumented()` and every
+SQL query adds its duration to the recorder. Outside sampled requests the
+decorators cost a single thread-local lookup.
+"""
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from django.db import connections
+from django.db.backends.utils import CursorWrapper
+
+_local = threading.local()
+
+class RequestTimings(object):
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.metrics = OrderedDict()
+
+    def add(self, name, duration):
+        metric = self.metrics.get(name)
+        if metric is None:
+            self.metrics[name] = [1, duration]
+        else:
+            metric[0] += 1
+            metric[1] += duration
+
+    def finish(self):
+        self.add('total', time.perf_counter() - self.start)
+
+    def server_timing(self):
+        """
+        Format the metrics as a `Server-Timing` header value, in milliseconds.
+        """
+        return ', '.join(
+            '%s;desc="%d";dur=%.3f' % (name, count, duration * 1000)
+            for name, (count, duration) in self.metrics.items()
+        )
+
+    def as_dict(self):
+        return OrderedDict(
+            (name, {'count': count, 'ms': round(duration * 1000, 3)})
+            for name, (count, duration) in self.metrics.items()
+        )
+
+def current_timings():
+    return getattr(_local, 'timings', None)
+
+def instrumented(name):
+    """
+    Decorator adding the duration of each call to the metric `name`.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            timings = getattr(_local, 'timings', None)
+            if timings is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timings.add(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+class TimedCursorWrapper(CursorWrapper):
+    def __init__(self, cursor, db, timings):
+        super(TimedCursorWrapper, self).__init__(cursor, db)
+        self.timings = timings
+
+    def execute(self, sql, params=None):
+        start = time.perf_counter()
+        try:
+            return self.cursor.execute(sql, params)
+        finally:
+            self.timings.add('sql', time.perf_counter() - start)
+
+    def executemany(self, sql, param_list):
+        start = time.perf_counter()
+        try:
+            return self.cursor.executemany(sql, param_list)
+        finally:
+            self.timings.add('sql', time.perf_counter() - start)
+
+def _restore_connections():
+    for connection in connections.all():
+        connection.__dict__.pop('make_cursor', None)
+        connection.__dict__.pop('make_debug_cursor', None)
+
+def start_request():
+    _restore_connections()
+    timings = RequestTimings()
+    _local.timings = timings
+    for connection in connections.all():
+        # Shadow the cursor factories on this (thread-local) connection only
+        make_cursor, make_debug_cursor = connection.make_cursor, connection.make_debug_cursor
+        connection.make_cursor = lambda cursor, make=make_cursor, db=connection: (
+            TimedCursorWrapper(make(cursor), db, timings))
+        connection.make_debug_cursor = lambda cursor, make=make_debug_cursor, db=connection: (
+            TimedCursorWrapper(make(cursor), db, timings))
+    return timings
+
+def finish_request():
+    timings = getattr(_local, 'timings', None)
+    if timings is None:
+        return None
+    del _local.timings
+    _restore_connections()
+    timings.finish()
+    return timings
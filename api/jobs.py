@@ -0,0 +1,187 @@
+"""
+Background jobs kept in the database.
+
+`enqueue()` writes a `Job` row in the caller's transaction. Django 1.8 has no
+`transaction.on_commit`, but a row in the same database behaves like one:
+workers only see the job once the transaction commits, and never if it rolls
+back.
+
+`manage.py run_jobs` workers claim due jobs in batches. On PostgreSQL the
+batch is picked with `SELECT ... FOR UPDATE SKIP LOCKED`, so concurrent
+workers take disjoint batches without waiting on each other. SQLite has no
+row locks, there a conditional `UPDATE`, serialized by the database lock,
+only claims rows nobody else has claimed. Claims are leases: the jobs of a
+worker that died are claimed again once `LEASE_SECONDS` have passed, so a
+job runs at least once, and possibly more than once.
+"""
+import datetime
+import json
+import logging
+import random
+import traceback
+import uuid
+
+from django.conf import settings
+from django.core.mail import mail_admins
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+DEFAULTS = {
+    # Jobs claimed at once by a worker
+    'BATCH_SIZE': 10,
+    # Seconds a claimed job stays reserved to its worker
+    'LEASE_SECONDS': 300,
+    'MAX_ATTEMPTS': 5,
+    # Retry n of a job waits BACKOFF_SECONDS * 2 ** (n - 1), plus up to a
+    # quarter of that at random, and at most MAX_BACKOFF_SECONDS
+    'BACKOFF_SECONDS': 10,
+    'MAX_BACKOFF_SECONDS': 3600,
+    # Seconds an idle worker waits before looking for due jobs again
+    'POLL_SECONDS': 1,
+}
+
+logger = logging.getLogger('api.jobs')
+
+_handlers = {}
+
+def get_jobs_option(name):
+    return getattr(settings, 'API_JOBS', {}).get(name, DEFAULTS[name])
+
+def job(name):
+    """
+    Decorator registering a function, called with the job's payload, as the
+    handler of the jobs named `name`.
+    """
+    def decorator(func):
+        _handlers[name] = func
+        return func
+    return decorator
+
+def enqueue(name, payload=None, delay=0):
+    """
+    Queue the job `name` with a JSON serializable `payload`, due in `delay`
+    seconds, once the current transaction commits.
+    """
+    from api.models import Job
+
+    if name not in _handlers:
+        raise ValueError("Unknown job %r." % name)
+    return Job.objects.create(
+        name=name, payload=json.dumps(payload or {}),
+        run_at=timezone.now() + datetime.timedelta(seconds=delay)
+    )
+
+def due_jobs(now):
+    from api.models import Job
+
+    return Job.objects.filter(
+        Q(locked_until__isnull=True) | Q(locked_until__lt=now),
+        failed_at__isnull=True, run_at__lte=now
+    )
+
+def claim_jobs(worker, batch_size):
+    """
+    Lease up to `batch_size` due jobs to `worker` and return them.
+    """
+    from api.models import Job
+
+    now = timezone.now()
+    claim = ('%s:%s' % (worker, uuid.uuid4().hex[:8]))[-100:]
+    lease = now + datetime.timedelta(seconds=get_jobs_option('LEASE_SECONDS'))
+    connection = connections[DEFAULT_DB_ALIAS]
+
+    if connection.vendor == 'postgresql':
+        table = connection.ops.quote_name(Job._meta.db_table)
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT id FROM %s WHERE failed_at IS NULL AND run_at <= %%s '
+                    'AND (locked_until IS NULL OR locked_until < %%s) '
+                    'ORDER BY run_at LIMIT %%s FOR UPDATE SKIP LOCKED' % table,
+                    [now, now, batch_size]
+                )
+                ids = [row[0] for row in cursor.fetchall()]
+            claimed = Job.objects.filter(pk__in=ids).update(
+                locked_by=claim, locked_until=lease, attempts=F('attempts') + 1
+            )
+    else:
+        # Outside a transaction: a read lock held until the UPDATE would
+        # deadlock two workers. The UPDATE checks again that the jobs are
+        # due, and so unclaimed, under the database lock.
+        ids = list(due_jobs(now).order_by('run_at').values_list('pk', flat=True)[:batch_size])
+        claimed = due_jobs(now).filter(pk__in=ids).update(
+            locked_by=claim, locked_until=lease, attempts=F('attempts') + 1
+        ) if ids else 0
+    if not claimed:
+        return []
+    return list(Job.objects.filter(locked_by=claim).order_by('run_at'))
+
+def release_jobs(jobs):
+    """
+    Give claimed jobs back without counting an attempt.
+    """
+    from api.models import Job
+
+    for claimed in jobs:
+        Job.objects.filter(pk=claimed.pk, locked_by=claimed.locked_by).update(
+            locked_by='', locked_until=None, attempts=F('attempts') - 1
+        )
+
+def get_backoff(attempts):
+    delay = min(get_jobs_option('BACKOFF_SECONDS') * 2 ** (attempts - 1), get_jobs_option('MAX_BACKOFF_SECONDS'))
+    return datetime.timedelta(seconds=delay + random.uniform(0, delay / 4.0))
+
+def run_job(claimed):
+    """
+    Run a claimed job, then delete it or, if it raised, schedule its retry.
+
+    Returns whether the job succeeded. The updates are conditional on the
+    claim, in case the lease ran out and another worker claimed the job.
+    """
+    from api.models import Job
+
+    mine = Job.objects.filter(pk=claimed.pk, locked_by=claimed.locked_by)
+    try:
+        handler = _handlers.get(claimed.name)
+        if handler is None:
+            raise LookupError("No handler for job %r." % claimed.name)
+        handler(json.loads(claimed.payload))
+    except Exception:
+        error = traceback.format_exc()
+        now = timezone.now()
+        if claimed.attempts >= get_jobs_option('MAX_ATTEMPTS'):
+            logger.error('Job %s (%s) failed for good after %d attempts:\n%s',
+                         claimed.pk, claimed.name, claimed.attempts, error)
+            mine.update(failed_at=now, locked_by='', locked_until=None, last_error=error)
+        else:
+            logger.warning('Job %s (%s) failed, attempt %d:\n%s', claimed.pk, claimed.name, claimed.attempts, error)
+            mine.update(run_at=now + get_backoff(claimed.attempts), locked_by='', locked_until=None,
+                        last_error=error)
+        return False
+    mine.delete()
+    return True
+
+def run_due_jobs(worker, batch_size=None, should_stop=None):
+    """
+    Claim one batch of due jobs and run them, returning how many were
+    claimed. Jobs not yet run when `should_stop()` turns true are released.
+    """
+    jobs = claim_jobs(worker, batch_size or get_jobs_option('BATCH_SIZE'))
+    for index, claimed in enumerate(jobs):
+        if should_stop is not None and should_stop():
+            release_jobs(jobs[index:])
+            break
+        run_job(claimed)
+    return len(jobs)
+
+@job('notify_signup')
+def notify_signup(payload):
+    """
+    Tell the admins about new accounts waiting to be activated.
+    """
+    usernames = payload['usernames']
+    mail_admins(
+        "%d new account(s) to activate" % len(usernames),
+        "These accounts are waiting to be activated:\n\n%s\n" % '\n'.join(usernames)
+    )
@@ -0,0 +1,50 @@
+import os
+import signal
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from api.jobs import get_jobs_option, run_due_jobs
+
+class Command(BaseCommand):
+    help = ("Run queued background jobs until stopped. Any number of workers can run at once, "
+            "on one host or several.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', default=False,
+                            help="Exit once no job is due instead of waiting for more.")
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help="Jobs claimed at once, API_JOBS['BATCH_SIZE'] by default.")
+
+    def handle(self, *args, **options):
+        worker = '%s:%d' % (socket.gethostname(), os.getpid())
+        self.stopping = False
+        previous_handlers = {}
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            previous_handlers[signum] = signal.signal(signum, self.stop)
+
+        total = 0
+        try:
+            while not self.stopping:
+                # Like a request, each batch starts with connections that are
+                # usable and not past CONN_MAX_AGE
+                close_old_connections()
+                count = run_due_jobs(worker, options['batch_size'], should_stop=lambda: self.stopping)
+                total += count
+                if count:
+                    continue
+                if options['once']:
+                    break
+                time.sleep(get_jobs_option('POLL_SECONDS'))
+        finally:
+            # call_command() may run this in a process that keeps going
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+        close_old_connections()
+        if options['verbosity'] > 1:
+            self.stdout.write("Ran %d job(s)." % total)
+
+    def stop(self, signum, frame):
+        # Finish the job at hand, give the rest of the batch back and exit
+        self.stopping = True
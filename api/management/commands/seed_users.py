@@ -0,0 +1,127 @@
+import datetime
+import multiprocessing
+import random
+import time
+
+import django
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+SYLLABLES = ['ma', 'ri', 'ko', 'la', 'ne', 'to', 'sa', 'pe', 'di', 'vu', 'jo', 'an', 'el', 'ho', 'su', 'ti']
+
+DOMAINS = 1000
+
+# Share of the accounts still waiting to be activated
+INACTIVE_RATIO = 0.05
+
+def generate_users(start, size, password, seed, joined_since):
+    """
+    Build `size` unsaved users numbered from `start`. The same `start` and
+    `seed` always give the same users, whichever worker builds them.
+    """
+    User = get_user_model()
+    rng = random.Random('%s:%d' % (seed, start))
+    span = int((timezone.now() - joined_since).total_seconds())
+    users = []
+    for number in range(start, start + size):
+        first_name = ''.join(rng.choice(SYLLABLES) for i in range(rng.randint(2, 3)))
+        last_name = ''.join(rng.choice(SYLLABLES) for i in range(rng.randint(2, 4)))
+        username = '%s%s%d' % (first_name, last_name[0], number)
+        users.append(User(
+            username=username,
+            password=password,
+            first_name=first_name.title(),
+            last_name=last_name.title(),
+            email='%s@d%03d.example.com' % (username, rng.randrange(DOMAINS)),
+            is_active=rng.random() >= INACTIVE_RATIO,
+            date_joined=joined_since + datetime.timedelta(seconds=rng.randrange(span)),
+        ))
+    return users
+
+def insert_batch(batch):
+    """
+    Insert one batch of users in its own transaction and return its size.
+    """
+    start, size, password, seed, joined_since = batch
+    users = generate_users(start, size, password, seed, joined_since)
+    with transaction.atomic():
+        # The backend splits the INSERT where it limits the query parameters
+        get_user_model().objects.bulk_create(users)
+    return size
+
+def setup_worker():
+    django.setup()
+    if connection.vendor == 'sqlite':
+        # Only this worker's connection, the database file is left as is.
+        # The workers take turns writing, so wait for the lock a while.
+        connection.settings_dict.setdefault('OPTIONS', {})['timeout'] = 300
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous = OFF')
+
+class Command(BaseCommand):
+    help = ("Create COUNT synthetic users for scale testing, in batches inserted by parallel worker "
+            "processes. Every user gets the same password, hashed once.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('count', type=int)
+        parser.add_argument('--batch-size', type=int, default=10000,
+                            help="Users per bulk insert and per transaction.")
+        parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count(),
+                            help="Worker processes, 1 inserts from this process.")
+        parser.add_argument('--password', default='password',
+                            help="Password of every seeded user.")
+        parser.add_argument('--seed', default='govtracker',
+                            help="Seed of the random generator, the same seed gives the same users.")
+        parser.add_argument('--days', type=int, default=3 * 365,
+                            help="Spread the join dates over this many past days.")
+
+    def handle(self, *args, **options):
+        count, batch_size, workers = options['count'], options['batch_size'], options['workers']
+        if count < 0 or batch_size < 1 or workers < 1:
+            raise CommandError("count cannot be negative, --batch-size and --workers must be positive.")
+
+        User = get_user_model()
+        # Numbering the users past the highest id keeps usernames unique
+        # across runs
+        first = (User.objects.aggregate(Max('pk'))['pk__max'] or 0) + 1
+        password = make_password(options['password'])
+        joined_since = timezone.now() - datetime.timedelta(days=options['days'])
+        batches = [
+            (start, min(batch_size, first + count - start), password, options['seed'], joined_since)
+            for start in range(first, first + count, batch_size)
+        ]
+
+        started = time.time()
+        if workers == 1 or len(batches) == 1:
+            self.insert(map(insert_batch, batches), count, options['verbosity'], started)
+        else:
+            # The workers are forked: none of them may inherit an open connection
+            connections.close_all()
+            pool = multiprocessing.Pool(min(workers, len(batches)), initializer=setup_worker)
+            try:
+                self.insert(pool.imap_unordered(insert_batch, batches), count, options['verbosity'], started)
+                pool.close()
+            except BaseException:
+                pool.terminate()
+                raise
+            finally:
+                pool.join()
+
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE %s' % connection.ops.quote_name(User._meta.db_table))
+        if options['verbosity'] > 0:
+            elapsed = time.time() - started
+            self.stdout.write("Created %d users in %.1fs (%d users/s)." % (
+                count, elapsed, count / elapsed if elapsed else 0))
+
+    def insert(self, results, count, verbosity, started):
+        done = 0
+        for size in results:
+            done += size
+            if verbosity > 1:
+                self.stdout.write("%d/%d users, %.1fs" % (done, count, time.time() - started))
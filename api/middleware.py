@@ -0,0 +1,257 @@
+import gzip
+import json
+import logging
+import random
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.module_loading import import_string
+from django.utils.text import compress_sequence
+from rest_framework.permissions import SAFE_METHODS
+from api.instrumentation import instrumented, start_request, finish_request
+from api.routers import get_routing_option, reset_routing, pin_to_primary, wrote_to_primary
+
+logger = logging.getLogger('api.performance')
+
+INSTRUMENTATION_DEFAULTS = {
+    'ENABLED': True,
+    # Fraction of requests instrumented
+    'SAMPLE_RATE': 0.01,
+    # Send the timings back in a Server-Timing header, not for production
+    'HEADER': False,
+    'LOG': True,
+}
+
+COMPRESSION_DEFAULTS = {
+    'ENABLED': True,
+    # Bodies smaller than this are sent as they are, the saving would not
+    # pay for the CPU time
+    'MIN_SIZE': 1024,
+    'GZIP_LEVEL': 6,
+    # Qualities above 5 are meant for static assets, not per-request work
+    'BROTLI_QUALITY': 4,
+    # Paths never compressed
+    'EXCLUDE_PATHS': (),
+}
+
+COMPRESSIBLE_MEDIA_TYPES = (
+    'application/json', 'application/x-ndjson', 'application/msgpack', 'application/javascript', 'application/xml',
+)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+def is_stateless_request(request):
+    """
+    Return whether a request is served by the stateless, JWT-only API.
+
+    Everything under `API_MODE_PATH` is, except the paths listed in
+    `API_MODE_FULL_STACK_PATHS`, which keep sessions, CSRF and messages.
+    """
+    stateless = getattr(request, 'stateless_api', None)
+    if stateless is None:
+        path = request.path_info
+        stateless = (path.startswith(settings.API_MODE_PATH) and
+                     not path.startswith(tuple(settings.API_MODE_FULL_STACK_PATHS)))
+        request.stateless_api = stateless
+    return stateless
+
+class APIModeMiddleware(object):
+    """
+    Classify the request once, before any of the middleware below runs.
+    """
+
+    def process_request(self, request):
+        is_stateless_request(request)
+
+class FullStackOnlyMiddleware(object):
+    """
+    Run the middleware named by `middleware_class` for every request except
+    the stateless API ones, which skip it entirely.
+    """
+    middleware_class = None
+
+    def __init__(self):
+        middleware = import_string(self.middleware_class)()
+        for hook in ('process_request', 'process_view', 'process_template_response', 'process_exception'):
+            method = getattr(middleware, hook, None)
+            if method is not None:
+                setattr(self, hook, self.skip_stateless(method))
+        method = getattr(middleware, 'process_response', None)
+        if method is not None:
+            setattr(self, 'process_response', self.skip_stateless_response(method))
+
+    def skip_stateless(self, method):
+        def hook(request, *args, **kwargs):
+            if not is_stateless_request(request):
+                return method(request, *args, **kwargs)
+        return hook
+
+    def skip_stateless_response(self, method):
+        def hook(request, response):
+            if is_stateless_request(request):
+                return response
+            return method(request, response)
+        return hook
+
+class SessionMiddleware(FullStackOnlyMiddleware):
+    middleware_class = 'django.contrib.sessions.middleware.SessionMiddleware'
+
+class CsrfViewMiddleware(FullStackOnlyMiddleware):
+    middleware_class = 'django.middleware.csrf.CsrfViewMiddleware'
+
+class AuthenticationMiddleware(FullStackOnlyMiddleware):
+    middleware_class = 'django.contrib.auth.middleware.AuthenticationMiddleware'
+
+class SessionAuthenticationMiddleware(FullStackOnlyMiddleware):
+    middleware_class = 'django.contrib.auth.middleware.SessionAuthenticationMiddleware'
+
+class MessageMiddleware(FullStackOnlyMiddleware):
+    middleware_class = 'django.contrib.messages.middleware.MessageMiddleware'
+
+class ServerTimingMiddleware(object):
+    """
+    Instrument a sample of requests and report where their time went, in a
+    `Server-Timing` header and as one JSON log line on `api.performance`.
+
+    Should come first so that the total covers the other middleware too.
+    """
+
+    def get_options(self):
+        return dict(INSTRUMENTATION_DEFAULTS, **getattr(settings, 'API_INSTRUMENTATION', {}))
+
+    def process_request(self, request):
+        options = self.get_options()
+        if options['ENABLED'] and random.random() < options['SAMPLE_RATE']:
+            start_request()
+
+    def process_response(self, request, response):
+        timings = finish_request()
+        if timings is None:
+            return response
+        options = self.get_options()
+        if options['HEADER']:
+            response['Server-Timing'] = timings.server_timing()
+        if options['LOG']:
+            logger.info(json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'timings': timings.as_dict(),
+            }))
+        return response
+
+class ReplicaRoutingMiddleware(object):
+    """
+    Pin requests to the primary database where replicas could be stale.
+
+    Unsafe methods always read from the primary. A request that writes sets
+    a short-lived cookie, so that the same client keeps reading from the
+    primary until the replicas have caught up with its write.
+    """
+
+    def process_request(self, request):
+        reset_routing()
+        if request.method not in SAFE_METHODS or get_routing_option('PIN_COOKIE') in request.COOKIES:
+            pin_to_primary()
+
+    def process_response(self, request, response):
+        if wrote_to_primary() and get_routing_option('REPLICAS'):
+            response.set_cookie(get_routing_option('PIN_COOKIE'), '1',
+                                max_age=get_routing_option('PIN_SECONDS'), httponly=True)
+        reset_routing()
+        return response
+
+def parse_accept_encoding(header):
+    """
+    Return the codings of an `Accept-Encoding` header mapped to their q-values.
+    """
+    codings = {}
+    for item in header.split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        codings[coding] = quality
+    return codings
+
+def negotiate_encoding(header, available):
+    """
+    Return the coding of `available`, in order of preference, the client
+    accepts best, or None.
+    """
+    codings = parse_accept_encoding(header)
+    best, best_quality = None, 0.0
+    for coding in available:
+        quality = codings.get(coding, codings.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+def is_compressible(content_type):
+    media_type = content_type.split(';')[0].strip().lower()
+    return (media_type.startswith('text/') or media_type.endswith('+json') or
+            media_type in COMPRESSIBLE_MEDIA_TYPES)
+
+class CompressionMiddleware(object):
+    """
+    Compress responses with brotli, when the `brotli` package is installed,
+    or gzip, whichever `Accept-Encoding` prefers.
+
+    Bodies under `MIN_SIZE` are left alone. Streamed responses, such as the
+    export, are gzipped as they stream. Strong ETags become weak, since the
+    bytes sent no longer match the representation they were computed from.
+    """
+
+    def get_options(self):
+        return dict(COMPRESSION_DEFAULTS, **getattr(settings, 'API_COMPRESSION', {}))
+
+    def process_response(self, request, response):
+        options = self.get_options()
+        if (not options['ENABLED'] or response.has_header('Content-Encoding') or
+                not is_compressible(response.get('Content-Type', '')) or
+                request.path_info.startswith(tuple(options['EXCLUDE_PATHS']))):
+            return response
+
+        header = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if response.streaming:
+            patch_vary_headers(response, ('Accept-Encoding',))
+            coding = negotiate_encoding(header, ('gzip',))
+            if coding is None:
+                return response
+            response.streaming_content = compress_sequence(response.streaming_content)
+            del response['Content-Length']
+        else:
+            if len(response.content) < options['MIN_SIZE']:
+                return response
+            patch_vary_headers(response, ('Accept-Encoding',))
+            coding = negotiate_encoding(header, ('br', 'gzip') if brotli is not None else ('gzip',))
+            if coding is None:
+                return response
+            content = self.compress(coding, response.content, options)
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response['Content-Length'] = str(len(content))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = coding
+        return response
+
+    @instrumented('compress')
+    def compress(self, coding, content, options):
+        if coding == 'br':
+            return brotli.compress(content, quality=options['BROTLI_QUALITY'])
+        return gzip.compress(content, compresslevel=options['GZIP_LEVEL'])
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations
+
+# Indexes backing `api.filters.UserFilterBackend`, as (name, definition).
+# `%(table)s` is the quoted user table.
+INDEXES = {
+    'postgresql': [
+        ('api_user_username_lower', '%(table)s (lower(username) text_pattern_ops)'),
+        ('api_user_username_trgm', '%(table)s USING gin (lower(username) gin_trgm_ops)'),
+        ('api_user_email_trgm', '%(table)s USING gin (lower(email) gin_trgm_ops)'),
+        ('api_user_date_joined', '%(table)s (date_joined)'),
+        ('api_user_active_date_joined', '%(table)s (is_active, date_joined)'),
+    ],
+    'sqlite': [
+        ('api_user_username_lower', '%(table)s (lower(username))'),
+        ('api_user_email_domain', "%(table)s (lower(substr(email, instr(email, '@'))))"),
+        ('api_user_date_joined', '%(table)s (date_joined)'),
+        ('api_user_active_date_joined', '%(table)s (is_active, date_joined)'),
+    ],
+}
+
+
+def create_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    table = schema_editor.quote_name(apps.get_model(settings.AUTH_USER_MODEL)._meta.db_table)
+    if vendor == 'postgresql':
+        # Needs a role allowed to create extensions the first time
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, definition in INDEXES.get(vendor, []):
+        schema_editor.execute('CREATE INDEX %s ON %s' % (
+            schema_editor.quote_name(name), definition % {'table': table}
+        ))
+
+
+def drop_indexes(apps, schema_editor):
+    for name, definition in INDEXES.get(schema_editor.connection.vendor, []):
+        schema_editor.execute('DROP INDEX IF EXISTS %s' % schema_editor.quote_name(name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api', '0003_revokedtoken'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+from django.conf import settings
+import django.utils.timezone
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api', '0005_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditEvent',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('action', models.CharField(max_length=32, choices=[('create', 'Create'), ('update', 'Update'), ('password_change', 'Password change'), ('login', 'Login')])),
+                ('changes', models.TextField(default='[]')),
+                ('remote_addr', models.GenericIPAddressField(null=True)),
+                ('timestamp', models.DateTimeField(default=django.utils.timezone.now)),
+                ('actor', models.ForeignKey(null=True, related_name='+', on_delete=django.db.models.deletion.DO_NOTHING, to=settings.AUTH_USER_MODEL, db_index=False, db_constraint=False)),
+                ('user', models.ForeignKey(null=True, related_name='+', on_delete=django.db.models.deletion.DO_NOTHING, to=settings.AUTH_USER_MODEL, db_index=False, db_constraint=False)),
+            ],
+        ),
+        migrations.AlterIndexTogether(
+            name='auditevent',
+            index_together=set([('user', 'timestamp'), ('actor', 'timestamp')]),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_audit_event'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auditevent',
+            name='user_ids',
+            field=models.TextField(default='[]'),
+        ),
+        migrations.AlterField(
+            model_name='auditevent',
+            name='action',
+            field=models.CharField(max_length=32, choices=[('create', 'Create'), ('update', 'Update'), ('password_change', 'Password change'), ('login', 'Login'), ('bulk_update', 'Bulk update')]),
+        ),
+    ]
@@ -1,3 +1,74 @@
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
+from api.audit import ACTIONS
 
-# Create your models here.
+class TokenVersion(models.Model):
+    """
+    Version stamped into every JWT issued to `user`; bumping it revokes all of
+    the user's outstanding tokens. Users without a row are at version 0.
+    """
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, primary_key=True, related_name='token_version')
+    version = models.PositiveIntegerField(default=0)
+
+    # A stale version read from a replica would be cached for VERSION_TTL
+    read_from_primary = True
+
+class RevokedToken(models.Model):
+    """
+    A single revoked JWT, kept until the token would have expired anyway.
+    """
+    jti = models.CharField(max_length=64, primary_key=True)
+    expires = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    # Replication lag must not delay a revocation
+    read_from_primary = True
+
+class Job(models.Model):
+    """
+    A unit of background work, run by `manage.py run_jobs`.
+
+    Pending jobs are due from `run_at`. A worker claims a job by leasing it
+    until `locked_until`, deletes it once it has run, and otherwise pushes
+    `run_at` back for a retry. Jobs out of attempts are kept with `failed_at`
+    set.
+    """
+    name = models.CharField(max_length=100)
+    payload = models.TextField(default='{}')
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_until = models.DateTimeField(null=True)
+    last_error = models.TextField(blank=True)
+    failed_at = models.DateTimeField(null=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    # Workers must see jobs as soon as they are committed
+    read_from_primary = True
+
+    class Meta:
+        index_together = [('failed_at', 'run_at')]
+
+class AuditEvent(models.Model):
+    """
+    Something done to, or by, a user's account, written by `api.audit`.
+
+    The users are referenced without a foreign key constraint, so that the
+    trail outlives them.
+    """
+    action = models.CharField(max_length=32, choices=ACTIONS)
+    # Indexed with the timestamp, see Meta
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, related_name='+',
+                             on_delete=models.DO_NOTHING, db_constraint=False, db_index=False)
+    actor = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, related_name='+',
+                              on_delete=models.DO_NOTHING, db_constraint=False, db_index=False)
+    # Names of the fields changed, never their values
+    changes = models.TextField(default='[]')
+    # Users changed by a bulk update, which has no `user`
+    user_ids = models.TextField(default='[]')
+    remote_addr = models.GenericIPAddressField(null=True)
+    timestamp = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        index_together = [('user', 'timestamp'), ('actor', 'timestamp')]
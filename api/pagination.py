@@ -0,0 +1,34 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+DEFAULTS = {
+    'PAGE_SIZE': 100,
+    'MAX_PAGE_SIZE': 1000,
+}
+
+class UserCursorPagination(CursorPagination):
+    """
+    Keyset pagination over the user primary key.
+
+    Each page is a `WHERE id > <cursor> ORDER BY id LIMIT n` query, so deep
+    pages cost the same as the first one. Clients may ask for a smaller or
+    larger page with `?page_size=`, up to `MAX_PAGE_SIZE`.
+    """
+    ordering = 'id'
+    page_size_query_param = 'page_size'
+
+    def get_page_size(self, request):
+        options = dict(DEFAULTS, **getattr(settings, 'API_USER_PAGINATION', {}))
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            page_size = options['PAGE_SIZE']
+        if page_size <= 0:
+            page_size = options['PAGE_SIZE']
+        return min(page_size, options['MAX_PAGE_SIZE'])
+
+class AuditCursorPagination(UserCursorPagination):
+    """
+    Keyset pagination over audit events, newest first.
+    """
+    ordering = '-timestamp'
@@ -0,0 +1,42 @@
+import msgpack
+from django.conf import settings
+from django.utils import six
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+from api.renderers import FastJSONRenderer, MessagePackRenderer, ujson
+
+class FastJSONParser(JSONParser):
+    """
+    `JSONParser` decoding with ujson when it is installed.
+    """
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if ujson is None:
+            return super(FastJSONParser, self).parse(stream, media_type, parser_context)
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+
+        try:
+            return ujson.loads(stream.read().decode(encoding))
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % six.text_type(exc))
+
+class MessagePackParser(BaseParser):
+    """
+    Parses MessagePack, strings being decoded as UTF-8.
+    """
+    media_type = 'application/msgpack'
+    renderer_class = MessagePackRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        data = stream.read()
+        try:
+            # Lengths are read from the body, don't let one claim more than
+            # the body holds and have the unpacker allocate it
+            return msgpack.unpackb(
+                data, raw=False, max_str_len=len(data), max_bin_len=len(data), max_ext_len=len(data),
+                max_array_len=len(data), max_map_len=len(data) // 2,
+            )
+        except (ValueError, TypeError, msgpack.exceptions.UnpackException) as exc:
+            raise ParseError('MessagePack parse error - %s' % six.text_type(exc))
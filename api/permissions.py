@@ -1,15 +1,18 @@
 from rest_framework.permissions import IsAdminUser
+from api.context import get_auth_context
+from api.instrumentation import instrumented
 
 class IsAdminOrSelfOrAnon(IsAdminUser):
     """
     Allow access to admin users or the user herself/himself.
     """
 
+    @instrumented('perm')
     def has_object_permission(self, request, view, obj):
-        if request.user and request.user.is_staff:
+        context = get_auth_context(request)
+        if context.is_staff:
             return True
-        elif (request.user and type(obj) == type(request.user) and
-              obj == request.user):
+        elif context.is_self(obj):
             return True
         return False
 
@@ -17,22 +20,24 @@ class IsAdminOrSelfOrAnon(IsAdminUser):
     Allows access only to admin users.
     """
 
+    @instrumented('perm')
     def has_permission(self, request, view):
         pk = view.kwargs.get('pk')
         try:
             pk = int(pk)
         except Exception:
             pk = None
-        if request.method == 'POST' and 'POST' in view.allowed_methods and pk is None:
+        if (request.method == 'POST' and 'POST' in view.allowed_methods and pk is None and
+                getattr(view, 'action', 'create') == 'create'):
             # Likely a POST against the list view, we will allow for user creation
             return True
         else:
-            if request.user:
-                user = request.user
-                if user.is_staff:
+            context = get_auth_context(request)
+            if context.user:
+                if context.is_staff:
                     return True
-                elif user.is_authenticated():
-                    if pk and pk != user.pk:
+                elif context.is_authenticated:
+                    if pk and pk != context.user.pk:
                         return False
                     if not pk:
                         # deny access to list
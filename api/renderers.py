@@ -0,0 +1,76 @@
+import json
+
+import msgpack
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils import encoders
+
+try:
+    import ujson
+    # ujson 1.x silently turns unknown types such as datetimes into numbers,
+    # later versions refuse them
+    if int(ujson.__version__.split('.')[0]) < 2:
+        ujson = None
+except ImportError:
+    ujson = None
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    `JSONRenderer` encoding with ujson when it is installed.
+
+    Data holding a type ujson does not know, such as a datetime, is rendered
+    by DRF's encoder instead, as is indented output for the browsable API.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if ujson is None or data is None or not self.compact:
+            return super(FastJSONRenderer, self).render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super(FastJSONRenderer, self).render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = ujson.dumps(data, ensure_ascii=self.ensure_ascii, escape_forward_slashes=False)
+        except (TypeError, OverflowError):
+            return super(FastJSONRenderer, self).render(data, accepted_media_type, renderer_context)
+        # Like JSONRenderer, keep the output a strict javascript subset
+        ret = ret.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+        return ret.encode('utf-8')
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Newline delimited JSON, one document per line.
+
+    Views normally stream NDJSON themselves, this renderer lets the format be
+    negotiated and renders anything else (errors) as a single line.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return bytes()
+        ret = json.dumps(
+            data, cls=encoders.JSONEncoder,
+            ensure_ascii=not api_settings.UNICODE_JSON,
+            separators=(',', ':')
+        )
+        return (ret + '\n').encode('utf-8')
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    MessagePack, for machine clients.
+
+    Renders the same data as JSON: types MessagePack has no equivalent for,
+    such as datetimes and decimals, are converted by DRF's JSON encoder.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+    encoder = encoders.JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return bytes()
+        return msgpack.packb(data, use_bin_type=True, default=self.encoder.default)
@@ -0,0 +1,115 @@
+import datetime
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+DEFAULTS = {
+    'ENABLED': True,
+    # Seconds between each worker's incremental reload of revoked tokens
+    'REFRESH_INTERVAL': 5,
+    # Seconds between full reloads, which also drop expired entries
+    'FULL_REFRESH_INTERVAL': 300,
+    # How far back each incremental reload looks beyond the previous one, to
+    # catch rows committed late by a slower worker
+    'OVERLAP': 30,
+}
+
+class RevocationList(object):
+    """
+    Per-process set of revoked token ids, mirrored from `RevokedToken`.
+
+    Checking a token is a set lookup. Each worker reloads the rows revoked
+    since its last reload at most every `REFRESH_INTERVAL` seconds, so a
+    revocation made in another worker takes effect within that interval;
+    revocations made in this worker take effect immediately.
+    """
+
+    def __init__(self, options=None):
+        self._lock = threading.Lock()
+        self.configure(options)
+
+    def configure(self, options=None):
+        if options is None:
+            options = getattr(settings, 'API_TOKEN_REVOCATION', {})
+        config = dict(DEFAULTS, **options)
+        self.enabled = config['ENABLED']
+        self.refresh_interval = config['REFRESH_INTERVAL']
+        self.full_refresh_interval = config['FULL_REFRESH_INTERVAL']
+        self.overlap = datetime.timedelta(seconds=config['OVERLAP'])
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            # jti -> expiry, as an aware datetime
+            self._revoked = {}
+            self.refreshed_at = None
+            self.fully_refreshed_at = None
+            self.loaded_until = None
+
+    def is_revoked(self, jti):
+        refreshed_at = self.refreshed_at
+        if refreshed_at is None or time.monotonic() - refreshed_at >= self.refresh_interval:
+            self.refresh()
+        return jti in self._revoked
+
+    def refresh(self, full=None):
+        """
+        Load the rows revoked since the last reload, or all unexpired rows if
+        `full` or a full reload is due.
+        """
+        from api.models import RevokedToken
+
+        if not self._lock.acquire(blocking=False):
+            # Another thread is reloading, use what we have until it is done
+            return
+        try:
+            now = time.monotonic()
+            if full is None:
+                full = (self.fully_refreshed_at is None or
+                        now - self.fully_refreshed_at >= self.full_refresh_interval)
+            started = timezone.now()
+            rows = RevokedToken.objects.filter(expires__gt=started)
+            if not full:
+                rows = rows.filter(revoked_at__gte=self.loaded_until - self.overlap)
+            loaded = dict(rows.values_list('jti', 'expires'))
+            if full:
+                # Keep tokens revoked here while the query ran
+                loaded.update((jti, expires) for jti, expires in self._revoked.items()
+                              if expires > started)
+                self._revoked = loaded
+                self.fully_refreshed_at = now
+            else:
+                self._revoked.update(loaded)
+            self.loaded_until = started
+            self.refreshed_at = now
+        finally:
+            self._lock.release()
+
+    def add(self, jti, expires):
+        self._revoked[jti] = expires
+
+    def __len__(self):
+        return len(self._revoked)
+
+revocation_list = RevocationList()
+
+def revoke_token(payload):
+    """
+    Revoke the single token `payload` was decoded from.
+    """
+    from api.models import RevokedToken
+
+    expires = datetime.datetime.fromtimestamp(payload['exp'], timezone.utc)
+    RevokedToken.objects.get_or_create(jti=payload['jti'], defaults={'expires': expires})
+    revocation_list.add(payload['jti'], expires)
+    purge_expired_tokens()
+
+def purge_expired_tokens():
+    """
+    Delete revocations of tokens that have expired anyway.
+    """
+    from api.models import RevokedToken
+
+    return RevokedToken.objects.filter(expires__lte=timezone.now()).delete()
@@ -0,0 +1,76 @@
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+DEFAULTS = {
+    # Aliases of the databases replicating `default`
+    'REPLICAS': (),
+    # Seconds a client keeps reading from the primary after a write, which
+    # should exceed the replication lag
+    'PIN_SECONDS': 5,
+    'PIN_COOKIE': 'api_primary',
+}
+
+_state = threading.local()
+
+def get_routing_option(name):
+    return getattr(settings, 'API_DATABASE_ROUTING', {}).get(name, DEFAULTS[name])
+
+def reset_routing():
+    """
+    Forget the routing decisions of the previous request on this thread.
+    """
+    _state.pinned = False
+    _state.wrote = False
+    _state.replica = None
+
+def pin_to_primary():
+    _state.pinned = True
+
+def wrote_to_primary():
+    return getattr(_state, 'wrote', False)
+
+@contextmanager
+def use_primary():
+    """
+    Read from the primary within the block, e.g. when the result is cached
+    and must not be older than the last write.
+    """
+    pinned = getattr(_state, 'pinned', False)
+    _state.pinned = True
+    try:
+        yield
+    finally:
+        # A write within the block keeps the rest of the request on the primary
+        _state.pinned = pinned or getattr(_state, 'wrote', False)
+
+class PrimaryReplicaRouter(object):
+    """
+    Send writes to `default` and reads to one of the replicas.
+
+    Reads stay on the primary once the current request has written, for
+    every request `ReplicaRoutingMiddleware` pins, inside `use_primary()`,
+    and for models flagged with `read_from_primary`. A request reads from a
+    single replica throughout, so that it never sees two different lags.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = get_routing_option('REPLICAS')
+        if not replicas or getattr(_state, 'pinned', False) or getattr(model, 'read_from_primary', False):
+            return DEFAULT_DB_ALIAS
+        replica = getattr(_state, 'replica', None)
+        if replica is None:
+            replica = _state.replica = random.choice(replicas)
+        return replica
+
+    def db_for_write(self, model, **hints):
+        _state.pinned = True
+        _state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every database holds the same data
+        return True
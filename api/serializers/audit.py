@@ -0,0 +1,18 @@
+import json
+
+from rest_framework.serializers import ModelSerializer, SerializerMethodField
+from api.models import AuditEvent
+
+class AuditEventSerializer(ModelSerializer):
+    changes = SerializerMethodField()
+    user_ids = SerializerMethodField()
+
+    def get_changes(self, obj):
+        return json.loads(obj.changes)
+
+    def get_user_ids(self, obj):
+        return json.loads(obj.user_ids)
+
+    class Meta:
+        model = AuditEvent
+        fields = ('id', 'action', 'user', 'user_ids', 'actor', 'changes', 'remote_addr', 'timestamp')
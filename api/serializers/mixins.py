@@ -0,0 +1,153 @@
+from collections import OrderedDict
+from collections.abc import Mapping
+
+from django.utils import six
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import CharField, EmailField, IntegerField
+from rest_framework.permissions import SAFE_METHODS
+from api.context import get_auth_context
+from api.instrumentation import instrumented
+
+# Field types whose `to_representation` is a plain type conversion
+FAST_FIELD_TYPES = {
+    IntegerField: int,
+    CharField: six.text_type,
+    EmailField: six.text_type,
+}
+
+class FastRepresentationMixin(object):
+    """
+    Render instances through a precompiled field plan.
+
+    The first serializer of a class builds its fields as usual and records,
+    for each readable field, the model attribute to read and the conversion
+    the field's `to_representation` applies. Every later instance, and every
+    item of a list, reuses that plan without going through the field
+    machinery. Serializers with a readable field the plan cannot reproduce
+    fall back to DRF's own `to_representation`.
+    """
+
+    def get_representation_key(self):
+        """
+        Return a hashable identifying the readable field set of this serializer.
+        """
+        return None
+
+    def get_representation_plan(self):
+        cls = type(self)
+        plans = cls.__dict__.get('_representation_plans')
+        if plans is None:
+            plans = {}
+            cls._representation_plans = plans
+        key = self.get_representation_key()
+        if key not in plans:
+            plans[key] = self.build_representation_plan()
+        return plans[key]
+
+    def build_representation_plan(self):
+        model = self.Meta.model
+        attnames = set(field.attname for field in model._meta.concrete_fields)
+        plan = []
+        for field in self._readable_fields:
+            convert = FAST_FIELD_TYPES.get(type(field))
+            if convert is None or len(field.source_attrs) != 1 or field.source_attrs[0] not in attnames:
+                return None
+            plan.append((field.field_name, field.source_attrs[0], convert))
+        return tuple(plan)
+
+    @instrumented('serialize')
+    def to_representation(self, instance):
+        plan = self.get_representation_plan()
+        if plan is None or isinstance(instance, Mapping):
+            return super(FastRepresentationMixin, self).to_representation(instance)
+        ret = OrderedDict()
+        for field_name, attname, convert in plan:
+            value = getattr(instance, attname)
+            ret[field_name] = None if value is None else convert(value)
+        return ret
+
+def select_fields(names, query_params):
+    """
+    Return the subset of `names` picked by the comma separated `fields` and
+    `exclude` query parameters, in their original order, or None when neither
+    parameter is given.
+    """
+    selected = None
+    for param in ('fields', 'exclude'):
+        value = query_params.get(param)
+        if not value:
+            continue
+        requested = [name.strip() for name in value.split(',') if name.strip()]
+        unknown = [name for name in requested if name not in names]
+        if unknown:
+            raise ValidationError({param: "Unknown field(s): %s." % ', '.join(unknown)})
+        if selected is None:
+            selected = tuple(names)
+        if param == 'fields':
+            selected = tuple(name for name in selected if name in requested)
+        else:
+            selected = tuple(name for name in selected if name not in requested)
+    return selected
+
+class SparseFieldsMixin(object):
+    """
+    Render only the fields picked with `?fields=` and `?exclude=`.
+
+    Applies to reads only, so that writes still validate every field. The
+    selection is part of the representation key, so each distinct selection
+    gets its own representation plan.
+    """
+    selected_fields = None
+
+    def get_fields(self):
+        fields = super(SparseFieldsMixin, self).get_fields()
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS:
+            return fields
+        readable = [name for name, field in fields.items() if not field.write_only]
+        self.selected_fields = select_fields(readable, request.query_params)
+        if self.selected_fields is not None:
+            for name in readable:
+                if name not in self.selected_fields:
+                    del fields[name]
+        return fields
+
+    def get_representation_key(self):
+        # Building the fields settles the selection
+        self.fields
+        return self.selected_fields
+
+    def get_selected_columns(self):
+        """
+        Return the model fields the selected fields read, for `.only()`, or
+        None if every column is needed.
+        """
+        fields = self.fields
+        if self.selected_fields is None:
+            return None
+        names = set(field.name for field in self.Meta.model._meta.concrete_fields)
+        columns = []
+        for field in fields.values():
+            if field.write_only:
+                continue
+            if len(field.source_attrs) != 1 or field.source_attrs[0] not in names:
+                return None
+            columns.append(field.source_attrs[0])
+        return columns
+
+class AuthContextMixin(object):
+    """
+    Give the serializer the `AuthContext` of the request it was built for.
+    """
+
+    @property
+    def auth_context(self):
+        request = self.context.get('request')
+        return get_auth_context(request) if request is not None else None
+
+    def get_actor_id(self):
+        """
+        Return the pk of the authenticated user making the change, if any.
+        """
+        context = self.auth_context
+        return context.user.pk if context is not None and context.is_authenticated else None
@@ -1,9 +1,48 @@
-from rest_framework.serializers import ModelSerializer, CharField, ValidationError
+from rest_framework.serializers import (
+    Serializer, ModelSerializer, ListSerializer, CharField, DictField, IntegerField, ListField, ValidationError
+)
+from rest_framework.validators import UniqueValidator
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction, IntegrityError
+from api.filters import UserFilterBackend
+from api.hashers import hash_passwords
+from api import audit
+from api.instrumentation import instrumented
+from api.jobs import enqueue
+from api.serializers.mixins import AuthContextMixin, FastRepresentationMixin, SparseFieldsMixin
+from api.tokens import get_claims_option, revoke_tokens_in_bulk
+from api.user_cache import user_cache, reset_user_versions
 
 UserModel = get_user_model()
 
-class UserSerializer(ModelSerializer):
+# Fields every user representation is made of
+USER_READ_FIELDS = ('id', 'username', 'email', 'first_name', 'last_name')
+
+BULK_CREATE_DEFAULTS = {
+    # Largest batch accepted in one request
+    'MAX_USERS': 1000,
+    # Threads hashing the passwords of a batch
+    'HASH_WORKERS': 4,
+    'BATCH_SIZE': 500,
+}
+
+BULK_UPDATE_DEFAULTS = {
+    # Largest list of ids accepted in one request, they all go into a single
+    # query and SQLite allows 999 parameters
+    'MAX_IDS': 500,
+    # Most users one request may change, by ids or by filter
+    'MAX_USERS': 1000,
+}
+
+# Write-only fields of a password change, never recorded as changes
+PASSWORD_FIELDS = ('current_password', 'new_password1', 'new_password2')
+
+# Fields carried in the JWT claims, see api.signals.revoke_stale_claims
+TOKEN_CLAIM_FIELDS = ('is_staff', 'is_active')
+
+class UserSerializer(AuthContextMixin, SparseFieldsMixin, FastRepresentationMixin, ModelSerializer):
     current_password = CharField(
         write_only=True,
         required=False,
@@ -29,6 +68,7 @@ class UserSerializer(ModelSerializer):
         style={'input_type': 'password'}
     )
 
+    @instrumented('validate')
     def validate(self, data):
         current_password = data['current_password'] if 'current_password' in data else None
         new_password1 = data['new_password1'] if 'new_password1' in data else None
@@ -67,14 +107,89 @@ class UserSerializer(ModelSerializer):
                     'current_password': "You entered the wrong password."
                 })
 
-        return super(UserSerializer, self).update(instance, validated_data)
+        changes = [
+            name for name, value in validated_data.items()
+            if name not in PASSWORD_FIELDS and getattr(instance, name) != value
+        ]
+        instance = super(UserSerializer, self).update(instance, validated_data)
+        context = self.auth_context
+        if context is not None and context.is_self(instance):
+            # Keep the request's identity in step with what was just saved
+            context.user = instance
+
+        request = self.context.get('request')
+        if changes:
+            audit.record(audit.UPDATE, instance.pk, self.get_actor_id(), changes, request)
+        if current_password is not None:
+            audit.record(audit.PASSWORD_CHANGE, instance.pk, self.get_actor_id(), request=request)
+        return instance
 
     class Meta:
         model = UserModel
         fields = ('id', 'username', 'email', 'first_name', 'last_name', 'current_password', 'new_password1', 'new_password2')
         read_only_fields = ('id', 'username')
 
-class UserCreateSerializer(ModelSerializer):
+class BulkUserCreateSerializer(ListSerializer):
+    """
+    Validate a list of users with `UserCreateSerializer` and create them all
+    in one transaction.
+
+    Errors are reported per item, in the order the users were given, and
+    nothing is created unless every item is valid.
+    """
+
+    def get_option(self, name):
+        return getattr(settings, 'API_BULK_CREATE', {}).get(name, BULK_CREATE_DEFAULTS[name])
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            max_users = self.get_option('MAX_USERS')
+            if len(data) > max_users:
+                raise ValidationError({
+                    'non_field_errors': ["You can create at most %d users at once." % max_users]
+                })
+            usernames = [item.get('username') for item in data if isinstance(item, dict)]
+            self.taken_usernames = set()
+            for start in range(0, len(usernames), 500):
+                self.taken_usernames.update(UserModel.objects.filter(
+                    username__in=usernames[start:start + 500]
+                ).values_list('username', flat=True))
+            self.batch_usernames = set()
+        return super(BulkUserCreateSerializer, self).to_internal_value(data)
+
+    def check_username(self, value):
+        if value in self.taken_usernames or value in self.batch_usernames:
+            raise ValidationError(UserModel._meta.get_field('username').error_messages['unique'])
+        self.batch_usernames.add(value)
+
+    def create(self, validated_data):
+        passwords = hash_passwords(
+            [item['new_password1'] for item in validated_data],
+            workers=self.get_option('HASH_WORKERS')
+        )
+        users = [self.child.build_user(item, password) for item, password in zip(validated_data, passwords)]
+        try:
+            with transaction.atomic():
+                UserModel.objects.bulk_create(users, batch_size=self.get_option('BATCH_SIZE'))
+                enqueue('notify_signup', {'usernames': [user.username for user in users]})
+        except IntegrityError:
+            raise ValidationError({
+                'non_field_errors': ["Some of these users were created in the meantime, please try again."]
+            })
+
+        # bulk_create does not set primary keys, read them back
+        created = {}
+        usernames = [user.username for user in users]
+        for start in range(0, len(usernames), 500):
+            for user in UserModel.objects.filter(username__in=usernames[start:start + 500]):
+                created[user.username] = user
+
+        actor_id = self.child.get_actor_id()
+        for user in created.values():
+            audit.record(audit.CREATE, user.pk, actor_id, request=self.context.get('request'))
+        return [created[username] for username in usernames]
+
+class UserCreateSerializer(AuthContextMixin, FastRepresentationMixin, ModelSerializer):
     new_password1 = CharField(
         write_only=True,
         required=False,
@@ -92,6 +207,7 @@ class UserCreateSerializer(ModelSerializer):
         style={'input_type': 'password'}
     )
 
+    @instrumented('validate')
     def validate(self, data):
         new_password1 = data['new_password1'] if 'new_password1' in data else None
         new_password2 = data['new_password2'] if 'new_password2' in data else None
@@ -111,15 +227,135 @@ class UserCreateSerializer(ModelSerializer):
             })
         return data
 
+    def get_fields(self):
+        fields = super(UserCreateSerializer, self).get_fields()
+        if isinstance(self.parent, BulkUserCreateSerializer):
+            # The batch checks usernames for uniqueness with a single query
+            fields['username'].validators = [
+                validator for validator in fields['username'].validators
+                if not isinstance(validator, UniqueValidator)
+            ]
+        return fields
+
+    def validate_username(self, value):
+        if isinstance(self.parent, BulkUserCreateSerializer):
+            self.parent.check_username(value)
+        return value
+
+    def build_user(self, validated_data, password):
+        """
+        Return an unsaved, inactive user, `password` being already hashed.
+        """
+        data = dict(validated_data)
+        data.pop('new_password1', None)
+        data.pop('new_password2', None)
+        data['password'] = password
+        data['is_active'] = False
+        return UserModel(**data)
+
     def create(self, validated_data):
-        new_password1 = validated_data['new_password1']
-        new_password2 = validated_data['new_password2']
-        validated_data['password'] = new_password1
-        validated_data['is_active'] = False
-        del validated_data['new_password1']
-        del validated_data['new_password2']
-        return super(UserCreateSerializer, self).create(validated_data)
+        user = self.build_user(validated_data, make_password(validated_data['new_password1']))
+        with transaction.atomic():
+            user.save()
+            enqueue('notify_signup', {'usernames': [user.username]})
+        audit.record(audit.CREATE, user.pk, self.get_actor_id(), request=self.context.get('request'))
+        return user
 
     class Meta:
         model = UserModel
         fields = ('id', 'username', 'email', 'first_name', 'last_name', 'new_password1', 'new_password2')
+        list_serializer_class = BulkUserCreateSerializer
+
+class UserChangesSerializer(ModelSerializer):
+    """
+    The fields a bulk update can set, each of them optional.
+    """
+
+    def validate(self, data):
+        if not data:
+            raise ValidationError("Give at least one field to change.")
+        return data
+
+    class Meta:
+        model = UserModel
+        fields = ('is_active', 'is_staff', 'first_name', 'last_name')
+
+class UserBulkUpdateSerializer(AuthContextMixin, Serializer):
+    """
+    Apply the same `changes` to the users listed in `ids`, or to every user
+    matching `filter`, which takes the parameters of the user list.
+
+    The change is an `UPDATE` per 500 users, which skips users that already
+    have the values asked for, and is refused when it would change more than
+    `MAX_USERS` users. Queryset updates send no signals, so the cache
+    invalidation and token revocation `api.signals` does on save happen
+    here, once the update has been committed, in a few cache calls and a
+    single audit event. Saving returns the number of users changed.
+    """
+    ids = ListField(child=IntegerField(), required=False)
+    filter = DictField(child=CharField(), required=False)
+    changes = UserChangesSerializer()
+
+    def get_option(self, name):
+        return getattr(settings, 'API_BULK_UPDATE', {}).get(name, BULK_UPDATE_DEFAULTS[name])
+
+    def validate_ids(self, value):
+        max_ids = self.get_option('MAX_IDS')
+        if len(value) > max_ids:
+            raise ValidationError("You can update at most %d users by id at once." % max_ids)
+        return value
+
+    def validate_filter(self, value):
+        backend = UserFilterBackend()
+        unknown = [name for name in value if name not in backend.parameters]
+        if unknown:
+            raise ValidationError("Unknown filter(s): %s." % ', '.join(sorted(unknown)))
+        if not any(value.values()):
+            raise ValidationError("Give at least one filter, there is no updating every user at once.")
+        # Parses every value, so that a bad one is reported here
+        backend.filter_params(UserModel.objects.none(), value)
+        return value
+
+    def validate(self, data):
+        if ('ids' in data) == ('filter' in data):
+            raise ValidationError("Give either ids or a filter.")
+        return data
+
+    def get_queryset(self, validated_data):
+        if 'ids' in validated_data:
+            return UserModel.objects.filter(pk__in=validated_data['ids'])
+        return UserFilterBackend().filter_params(UserModel.objects.all(), validated_data['filter'])
+
+    def create(self, validated_data):
+        changes = validated_data['changes']
+        claims = [name for name in TOKEN_CLAIM_FIELDS if name in changes]
+        queryset = self.get_queryset(validated_data).exclude(**changes)
+
+        max_users = self.get_option('MAX_USERS')
+
+        with transaction.atomic():
+            # One row past the limit tells a too broad filter, without
+            # locking the rest of the table
+            users = list(queryset.select_for_update().values_list('pk', 'username', *claims)[:max_users + 1])
+            if len(users) > max_users:
+                raise ValidationError({
+                    'non_field_errors': ["This would change more than %d users at once." % max_users]
+                })
+            # Only the rows locked above
+            pks = [user[0] for user in users]
+            updated = 0
+            for start in range(0, len(pks), 500):
+                updated += UserModel.objects.filter(pk__in=pks[start:start + 500]).update(**changes)
+
+        if not users:
+            return updated
+        reset_user_versions(pks)
+        for user in users:
+            user_cache.delete(user[1])
+        new_claims = tuple(changes[name] for name in claims)
+        revoked = [user[0] for user in users if user[2:] != new_claims]
+        if revoked and get_claims_option('ENABLED'):
+            revoke_tokens_in_bulk(revoked)
+        audit.record(audit.BULK_UPDATE, None, self.get_actor_id(), list(changes), self.context.get('request'),
+                     user_ids=pks)
+        return updated
@@ -0,0 +1,48 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+from django.test.signals import setting_changed
+from api.audit import audit_log
+from api.revocation import revocation_list
+from api.tokens import get_claims_option, revoke_tokens
+from api.user_cache import user_cache, bump_user_version
+
+UserModel = get_user_model()
+
+@receiver(post_save, sender=UserModel)
+@receiver(post_delete, sender=UserModel)
+def invalidate_user(sender, instance, **kwargs):
+    # Bumping the shared version invalidates the user in every worker, the
+    # local eviction just frees the slot in this one.
+    bump_user_version(instance.pk)
+    user_cache.delete(instance.get_username())
+
+def token_claims(user):
+    return (user.is_staff, user.is_active)
+
+@receiver(post_init, sender=UserModel)
+def remember_token_claims(sender, instance, **kwargs):
+    instance._token_claims = token_claims(instance)
+
+@receiver(post_save, sender=UserModel)
+def revoke_stale_claims(sender, instance, created, raw, **kwargs):
+    # Tokens carry is_staff and is_active, so changing either must revoke them
+    claims = token_claims(instance)
+    if not created and not raw and claims != instance._token_claims and get_claims_option('ENABLED'):
+        revoke_tokens(instance.pk)
+    instance._token_claims = claims
+
+@receiver(post_delete, sender=UserModel)
+def revoke_deleted_user_tokens(sender, instance, **kwargs):
+    # Claims tokens authorize without loading the user, which is gone
+    if get_claims_option('ENABLED'):
+        revoke_tokens(instance.pk, deleted=True)
+
+@receiver(setting_changed)
+def reload_settings(setting, **kwargs):
+    if setting == 'API_USER_CACHE':
+        user_cache.configure()
+    elif setting == 'API_TOKEN_REVOCATION':
+        revocation_list.configure()
+    elif setting == 'API_AUDIT':
+        audit_log.configure()
@@ -0,0 +1,50 @@
+from rest_framework.test import APITestCase, APITransactionTestCase
+from django.contrib.auth import get_user_model
+from django.core.urlresolvers import reverse
+
+User = get_user_model()
+
+class UsersMixin(object):
+    """
+    Create a regular user, john, and an admin, and log either of them in.
+    """
+
+    def setUp(self):
+        super(UsersMixin, self).setUp()
+        self.password = 'johnpassword'
+        self.user = User.objects.create_user('john', 'lennon@thebeatles.com', self.password, **{
+            'first_name': 'John',
+            'last_name': 'Lennon'
+        })
+        self.adminPassword = 'adminpassword'
+        self.adminUser = User.objects.create_superuser('admin', 'admin@thebeatles.com', self.adminPassword, **{
+            'first_name': 'The',
+            'last_name': 'Administrator'
+        })
+
+    def get_token(self, username, password, **extra):
+        url = reverse('obtain_jwt_token')
+        data = {
+            'username': username,
+            'password': password
+        }
+        response = self.client.post(url, data, format='json', **extra)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data['token']
+
+    def login(self, username, password, **extra):
+        token = self.get_token(username, password, **extra)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + token)
+        return token
+
+    def login_user(self):
+        return self.login(self.user.username, self.password)
+
+    def login_admin_user(self):
+        return self.login(self.adminUser.username, self.adminPassword)
+
+class UsersTestCase(UsersMixin, APITestCase):
+    pass
+
+class UsersTransactionTestCase(UsersMixin, APITransactionTestCase):
+    pass
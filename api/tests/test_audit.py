@@ -0,0 +1,133 @@
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from django.core.urlresolvers import reverse
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from api import audit
+from api.audit import audit_log
+from api.models import AuditEvent
+from api.tests.base import UsersTransactionTestCase
+
+User = get_user_model()
+
+AUDIT = {'ENABLED': True, 'BATCH_SIZE': 100, 'FLUSH_INTERVAL': 60, 'FLUSH_THREAD': False}
+
+# Events are only flushed outside of transactions, which the test cases
+# wrapping each test in one would prevent
+@override_settings(API_AUDIT=AUDIT)
+class AuditTestCase(UsersTransactionTestCase):
+    def events(self, user):
+        audit_log.flush()
+        return [(event.action, event.actor_id, event.changes) for event in audit.query_events(user_id=user.pk)]
+
+    def test_signup_is_audited(self):
+        """
+        Ensure creating a user records who did it and from where
+        """
+        response = self.client.post(reverse('v1:user-list'), {
+            'username': 'rstar',
+            'email': 'star@thebeatles.com',
+            'new_password1': 'booyah',
+            'new_password2': 'booyah'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        user = User.objects.get(username='rstar')
+        self.assertEqual(self.events(user), [(audit.CREATE, None, '[]')])
+        self.assertEqual(AuditEvent.objects.get(user=user).remote_addr, '127.0.0.1')
+
+    def test_update_is_audited(self):
+        """
+        Ensure an update records the fields changed and a password change, but no values
+        """
+        self.login_user()
+        url = reverse('v1:user-detail', kwargs={'pk': self.user.pk})
+        response = self.client.patch(url, {
+            'first_name': 'Johnny',
+            'email': self.user.email,
+            'current_password': self.password,
+            'new_password1': 'newpassword',
+            'new_password2': 'newpassword'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sorted(self.events(self.user)), [
+            (audit.LOGIN, self.user.pk, '[]'),
+            (audit.PASSWORD_CHANGE, self.user.pk, '[]'),
+            (audit.UPDATE, self.user.pk, '["first_name"]'),
+        ])
+
+    def test_bulk_update_is_audited(self):
+        """
+        Ensure a bulk update records one event listing the users, made by the admin
+        """
+        self.login_admin_user()
+        response = self.client.post(reverse('v1:user-bulk-update'), {
+            'ids': [self.user.pk],
+            'changes': {'is_active': False}
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        audit_log.flush()
+        events = audit.query_events(actor_id=self.adminUser.pk, actions=[audit.BULK_UPDATE])
+        self.assertEqual([(event.user_id, event.user_ids, event.changes) for event in events],
+                         [(None, '[%d]' % self.user.pk, '["is_active"]')])
+
+    def test_events_are_written_in_batches(self):
+        """
+        Ensure events are buffered and written together once the batch is full
+        """
+        with self.settings(API_AUDIT=dict(AUDIT, BATCH_SIZE=3)):
+            audit.record(audit.LOGIN, self.user.pk, self.user.pk)
+            audit.record(audit.LOGIN, self.user.pk, self.user.pk)
+            self.assertEqual(AuditEvent.objects.count(), 0)
+            with CaptureQueriesContext(connection) as queries:
+                audit.record(audit.LOGIN, self.user.pk, self.user.pk)
+            inserts = [query for query in queries.captured_queries if 'INSERT INTO "api_auditevent"' in query['sql']]
+            self.assertEqual(len(inserts), 1)
+            self.assertEqual(AuditEvent.objects.count(), 3)
+            self.assertEqual(len(audit_log), 0)
+
+    def test_events_are_written_in_time(self):
+        """
+        Ensure events do not wait for a full batch longer than the flush interval
+        """
+        with self.settings(API_AUDIT=dict(AUDIT, FLUSH_INTERVAL=0)):
+            audit.record(audit.LOGIN, self.user.pk, self.user.pk)
+            self.assertEqual(AuditEvent.objects.count(), 1)
+
+    def test_events_wait_for_the_transaction(self):
+        """
+        Ensure events are not written inside a transaction, which could roll them back
+        """
+        with self.settings(API_AUDIT=dict(AUDIT, BATCH_SIZE=1)):
+            with transaction.atomic():
+                audit.record(audit.LOGIN, self.user.pk, self.user.pk)
+                self.assertEqual(AuditEvent.objects.count(), 0)
+            self.assertEqual(audit_log.flush(), 1)
+            self.assertEqual(AuditEvent.objects.count(), 1)
+
+    def test_audit_list(self):
+        """
+        Ensure admins and the user can list the user's events, filtered by action, but no one else
+        """
+        url = reverse('v1:user-audit', kwargs={'pk': self.adminUser.pk})
+        self.login_user()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.login_admin_user()
+        audit.record(audit.UPDATE, self.adminUser.pk, self.adminUser.pk, ['last_name'])
+        audit_log.flush()
+        response = self.client.get(url, {'action': audit.LOGIN})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([event['action'] for event in response.data['results']], [audit.LOGIN])
+        self.assertEqual(response.data['results'][0]['actor'], self.adminUser.pk)
+
+        response = self.client.get(url, {'since': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        url = reverse('v1:user-audit', kwargs={'pk': self.user.pk})
+        self.login_user()
+        audit_log.flush()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([event['action'] for event in response.data['results']], [audit.LOGIN, audit.LOGIN])
@@ -0,0 +1,95 @@
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from django.core.urlresolvers import reverse
+from api.tests.base import UsersTestCase
+
+User = get_user_model()
+
+class BulkCreateTestCase(UsersTestCase):
+    def setUp(self):
+        super(BulkCreateTestCase, self).setUp()
+        self.url = reverse('v1:user-bulk')
+
+    def new_user(self, username, password='booyah'):
+        return {
+            'username': username,
+            'first_name': username.title(),
+            'last_name': 'Star',
+            'email': '%s@thebeatles.com' % username,
+            'new_password1': password,
+            'new_password2': password
+        }
+
+    def test_anon_cannot_bulk_create(self):
+        """
+        Ensure anonymous users cannot create users in bulk
+        """
+        response = self.client.post(self.url, [self.new_user('ringo')], format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertFalse(User.objects.filter(username='ringo').exists())
+
+    def test_cannot_bulk_create(self):
+        """
+        Ensure regular users cannot create users in bulk
+        """
+        self.login_user()
+        response = self.client.post(self.url, [self.new_user('ringo')], format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_admin_can_bulk_create(self):
+        """
+        Ensure admins can create a list of users at once
+        """
+        self.login_admin_user()
+        data = [self.new_user('ringo'), self.new_user('george'), self.new_user('paul')]
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([user['username'] for user in response.data], ['ringo', 'george', 'paul'])
+
+        for item in response.data:
+            user = User.objects.get(pk=item['id'])
+            self.assertEqual(user.username, item['username'])
+            self.assertEqual(user.email, item['email'])
+            self.assertFalse(user.is_active)
+            self.assertTrue(user.check_password('booyah'))
+
+    def test_bulk_create_reports_every_error(self):
+        """
+        Ensure every invalid user is reported and nothing is created
+        """
+        self.login_admin_user()
+        data = [
+            self.new_user('ringo'),
+            self.new_user('john'),
+            self.new_user('george', password='short'),
+            self.new_user('ringo'),
+        ]
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(response.data), 4)
+        self.assertEqual(response.data[0], {})
+        self.assertEqual(response.data[1]['username'], ['A user with that username already exists.'])
+        self.assertEqual(response.data[2]['new_password1'], ['Your new password must be longer than 6 characters.'])
+        self.assertEqual(response.data[3]['username'], ['A user with that username already exists.'])
+        self.assertFalse(User.objects.filter(username__in=['ringo', 'george']).exists())
+
+    def test_bulk_create_is_bounded(self):
+        """
+        Ensure a batch cannot be larger than the configured maximum
+        """
+        self.login_admin_user()
+        with self.settings(API_BULK_CREATE={'MAX_USERS': 1}):
+            response = self.client.post(self.url, [self.new_user('ringo'), self.new_user('george')], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('non_field_errors', response.data)
+
+    def test_created_user_password_is_hashed(self):
+        """
+        Ensure users created one at a time get a hashed password
+        """
+        url = reverse('v1:user-list')
+        response = self.client.post(url, self.new_user('ringo'), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        user = User.objects.get(username='ringo')
+        self.assertNotEqual(user.password, 'booyah')
+        self.assertTrue(user.check_password('booyah'))
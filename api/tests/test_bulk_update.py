@@ -0,0 +1,136 @@
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from api.tests.base import UsersTestCase
+
+User = get_user_model()
+
+class BulkUpdateTestCase(UsersTestCase):
+    def setUp(self):
+        super(BulkUpdateTestCase, self).setUp()
+        self.inactive = []
+        for name in ('ringo', 'george', 'rita'):
+            user = User.objects.create_user(name, '%s@thebeatles.com' % name, self.password)
+            user.is_active = False
+            user.save()
+            self.inactive.append(user)
+        self.url = reverse('v1:user-bulk-update')
+
+    def test_anon_cannot_bulk_update(self):
+        """
+        Ensure anonymous users cannot update users in bulk
+        """
+        response = self.client.post(self.url, {'ids': [self.user.pk], 'changes': {'is_active': False}}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_cannot_bulk_update(self):
+        """
+        Ensure regular users cannot update users in bulk
+        """
+        self.login_user()
+        response = self.client.post(self.url, {'ids': [self.user.pk], 'changes': {'is_staff': True}}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(User.objects.get(pk=self.user.pk).is_staff)
+
+    def test_admin_can_activate_by_ids(self):
+        """
+        Ensure admins can activate a list of users with a single UPDATE
+        """
+        self.login_admin_user()
+        ids = [user.pk for user in self.inactive[:2]] + [self.user.pk]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {'ids': ids, 'changes': {'is_active': True}}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # john already is active
+        self.assertEqual(response.data, {'updated': 2})
+        self.assertEqual(User.objects.filter(pk__in=ids, is_active=True).count(), 3)
+        self.assertFalse(User.objects.get(username='rita').is_active)
+        updates = [query for query in queries.captured_queries if 'UPDATE "auth_user"' in query['sql']]
+        self.assertEqual(len(updates), 1)
+
+    def test_admin_can_update_by_filter(self):
+        """
+        Ensure admins can update every user matching a filter of the user list
+        """
+        self.login_admin_user()
+        response = self.client.post(self.url, {
+            'filter': {'is_active': 'false', 'username': 'ri'},
+            'changes': {'is_active': True, 'last_name': 'Starr'}
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'updated': 2})
+        self.assertEqual(sorted(User.objects.filter(last_name='Starr').values_list('username', flat=True)),
+                         ['ringo', 'rita'])
+        self.assertFalse(User.objects.get(username='george').is_active)
+
+    def test_invalid_bulk_update(self):
+        """
+        Ensure bulk updates without a target or changes, or with a bad filter, are rejected
+        """
+        self.login_admin_user()
+        for data, field in (
+            ({'changes': {'is_active': True}}, 'non_field_errors'),
+            ({'ids': [1], 'filter': {'username': 'r'}, 'changes': {'is_active': True}}, 'non_field_errors'),
+            ({'ids': [1], 'changes': {}}, 'changes'),
+            ({'ids': [1], 'changes': {'username': 'paul'}}, 'changes'),
+            ({'filter': {}, 'changes': {'is_active': True}}, 'filter'),
+            ({'filter': {'password': 'x'}, 'changes': {'is_active': True}}, 'filter'),
+            ({'filter': {'is_active': 'maybe'}, 'changes': {'is_active': True}}, 'filter'),
+        ):
+            response = self.client.post(self.url, data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, data)
+            self.assertTrue(field in response.data, (data, response.data))
+
+        with self.settings(API_BULK_UPDATE={'MAX_IDS': 1}):
+            response = self.client.post(self.url, {'ids': [1, 2], 'changes': {'is_active': True}}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue('ids' in response.data)
+
+    def test_too_broad_bulk_update_is_rejected(self):
+        """
+        Ensure a filter matching more than MAX_USERS users changes none of them
+        """
+        self.login_admin_user()
+        with self.settings(API_BULK_UPDATE={'MAX_USERS': 1}):
+            response = self.client.post(self.url, {
+                'filter': {'is_active': 'false', 'username': 'ri'},
+                'changes': {'is_active': True}
+            }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue('non_field_errors' in response.data)
+        self.assertFalse(User.objects.filter(username__in=['ringo', 'rita'], is_active=True).exists())
+
+    def test_bulk_update_invalidates_cached_users(self):
+        """
+        Ensure users cached by the authentication see the bulk changes
+        """
+        token = self.get_token(self.user.username, self.password)
+        url = reverse('v1:user-detail', args=('current',))
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + token)
+        self.assertEqual(self.client.get(url, format='json').data['first_name'], 'John')
+
+        self.login_admin_user()
+        response = self.client.post(self.url, {'ids': [self.user.pk], 'changes': {'first_name': 'Johnny'}},
+                                    format='json')
+        self.assertEqual(response.data, {'updated': 1})
+
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + token)
+        response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['first_name'], 'Johnny')
+
+    def test_claim_changes_revoke_tokens(self):
+        """
+        Ensure changing is_staff or is_active in bulk revokes the users' tokens
+        """
+        token = self.get_token(self.user.username, self.password)
+        url = reverse('v1:user-detail', args=('current',))
+
+        self.login_admin_user()
+        self.client.post(self.url, {'ids': [self.user.pk], 'changes': {'is_staff': True}}, format='json')
+
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + token)
+        response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
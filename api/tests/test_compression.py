@@ -0,0 +1,101 @@
+import datetime
+import gzip
+import json
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from django.core.urlresolvers import reverse
+from django.test import SimpleTestCase, override_settings
+from api.middleware import negotiate_encoding
+from api.renderers import FastJSONRenderer
+from api.tests.base import UsersTestCase
+
+User = get_user_model()
+
+class CompressionTestCase(UsersTestCase):
+    def setUp(self):
+        super(CompressionTestCase, self).setUp()
+        User.objects.bulk_create([
+            User(username='user%d' % i, email='user%d@example.com' % i, first_name='First ' * 10, last_name='Last')
+            for i in range(50)
+        ])
+        self.token = self.login_admin_user()
+
+    def test_large_response_is_gzipped(self):
+        """
+        Ensure a large list is gzipped for clients accepting it
+        """
+        url = reverse('v1:user-list')
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertTrue('Accept-Encoding' in response['Vary'])
+        data = json.loads(gzip.decompress(response.content).decode('utf-8'))
+        self.assertEqual(len(data['results']), User.objects.count())
+
+    def test_not_compressed_unless_accepted(self):
+        """
+        Ensure responses are sent as they are without an acceptable coding
+        """
+        url = reverse('v1:user-list')
+        for header in ('', 'identity', 'gzip;q=0, br;q=0'):
+            response = self.client.get(url, HTTP_ACCEPT_ENCODING=header)
+            self.assertFalse(response.has_header('Content-Encoding'))
+            self.assertEqual(len(json.loads(response.content.decode('utf-8'))['results']), User.objects.count())
+
+    def test_small_response_is_not_compressed(self):
+        """
+        Ensure responses under the size threshold, and the auth endpoints, are not compressed
+        """
+        response = self.client.get(reverse('v1:user-detail', args=('current',)), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+        with override_settings(API_COMPRESSION={'MIN_SIZE': 0, 'EXCLUDE_PATHS': ('/api/auth/',)}):
+            response = self.client.post(reverse('verify_jwt_token'), {'token': self.token}, format='json',
+                                        HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    @override_settings(API_COMPRESSION={'MIN_SIZE': 0})
+    def test_compressed_etag_is_weak(self):
+        """
+        Ensure compressing weakens the ETag, which still answers If-None-Match
+        """
+        url = reverse('v1:user-detail', args=(User.objects.get(username='user0').pk,))
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertTrue(response['ETag'].startswith('W/"'))
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_export_is_gzipped_while_streaming(self):
+        """
+        Ensure the streamed export is gzipped too
+        """
+        url = reverse('v1:user-export')
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        rows = json.loads(gzip.decompress(b''.join(response.streaming_content)).decode('utf-8'))
+        self.assertEqual(len(rows), User.objects.count())
+
+class NegotiationTestCase(SimpleTestCase):
+    def test_negotiate_encoding(self):
+        """
+        Ensure the best coding is picked by q-value, then by server preference
+        """
+        self.assertEqual(negotiate_encoding('gzip, br', ('br', 'gzip')), 'br')
+        self.assertEqual(negotiate_encoding('gzip, br;q=0.5', ('br', 'gzip')), 'gzip')
+        self.assertEqual(negotiate_encoding('*', ('br', 'gzip')), 'br')
+        self.assertEqual(negotiate_encoding('*, br;q=0', ('br', 'gzip')), 'gzip')
+        self.assertEqual(negotiate_encoding('deflate', ('br', 'gzip')), None)
+
+    def test_fast_renderer_matches_json_renderer(self):
+        """
+        Ensure FastJSONRenderer renders what JSONRenderer does
+        """
+        data = {'username': 'john ', 'joined': datetime.datetime(2015, 1, 2, 3, 4, 5), 'ids': (1, 2)}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
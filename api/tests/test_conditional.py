@@ -0,0 +1,51 @@
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from django.core.urlresolvers import reverse
+from api.tests.base import UsersTestCase
+
+User = get_user_model()
+
+class ConditionalRetrieveTestCase(UsersTestCase):
+    def setUp(self):
+        super(ConditionalRetrieveTestCase, self).setUp()
+        self.login_user()
+        self.url = reverse('v1:user-detail', args=('current',))
+
+    def test_retrieve_has_etag(self):
+        """
+        Ensure user details carry a strong ETag
+        """
+        response = self.client.get(self.url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['ETag'].startswith('"'))
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+
+        url = reverse('v1:user-detail', args=(self.user.id,))
+        other = self.client.get(url, format='json')
+        self.assertEqual(other['ETag'], response['ETag'])
+
+    def test_unchanged_user_is_not_modified(self):
+        """
+        Ensure an unchanged user is answered with an empty 304
+        """
+        etag = self.client.get(self.url, format='json')['ETag']
+        response = self.client.get(self.url, format='json', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+
+        response = self.client.get(self.url, format='json', HTTP_IF_NONE_MATCH='"stale", ' + etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_update_changes_etag(self):
+        """
+        Ensure a write through the API invalidates the previous ETag
+        """
+        etag = self.client.get(self.url, format='json')['ETag']
+        response = self.client.patch(self.url, {'first_name': 'Ringo'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(self.url, format='json', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['first_name'], 'Ringo')
+        self.assertNotEqual(response['ETag'], etag)
@@ -0,0 +1,90 @@
+import os
+import threading
+from unittest import skipUnless
+from urllib.parse import urlparse
+
+from django.db.utils import ConnectionHandler
+from django.test import SimpleTestCase
+from api.db.backends.postgresql.base import _pools
+
+# A PostgreSQL database to run these tests against, in the format of
+# GOVTRACKER_POSTGRESQL_URL. They only open their own connections to it.
+TEST_POSTGRESQL_URL = os.environ.get('GOVTRACKER_TEST_POSTGRESQL_URL')
+
+@skipUnless(TEST_POSTGRESQL_URL, 'Set GOVTRACKER_TEST_POSTGRESQL_URL to test the PostgreSQL backend')
+class PooledBackendTestCase(SimpleTestCase):
+    def setUp(self):
+        url = urlparse(TEST_POSTGRESQL_URL)
+        settings_dict = {
+            'ENGINE': 'api.db.backends.postgresql',
+            'NAME': url.path.strip('/'),
+            'USER': url.username,
+            'PASSWORD': url.password,
+            'HOST': url.hostname,
+            'PORT': url.port,
+            'CONN_HEALTH_CHECKS': True,
+            'POOL': {'MIN_SIZE': 1, 'MAX_SIZE': 2},
+        }
+        # Apart from the test database, in which these tests write nothing
+        self.connections = ConnectionHandler({'default': dict(settings_dict, POOL=None), 'pooled': settings_dict})
+        self.connection = self.connections['pooled']
+        self.addCleanup(self.close)
+
+    def close(self):
+        self.connection.close()
+        self.connections['default'].close()
+        _pools.pop(('pooled', os.getpid())).closeall()
+
+    def backend_pid(self, connection):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_backend_pid()')
+            return cursor.fetchone()[0]
+
+    def start_request(self):
+        # What the request_started receiver does before each request
+        self.connection.health_check_pending = True
+
+    def test_connections_are_pooled(self):
+        """
+        Ensure closing a pooled connection hands it back for the next request
+        """
+        self.start_request()
+        pid = self.backend_pid(self.connection)
+        self.connection.close()
+        self.start_request()
+        self.assertEqual(self.backend_pid(self.connection), pid)
+
+    def test_dead_pooled_connection_is_replaced(self):
+        """
+        Ensure a pooled connection the server dropped is replaced before the request uses it
+        """
+        self.start_request()
+        pid = self.backend_pid(self.connection)
+        self.connection.close()
+        with self.connections['default'].cursor() as cursor:
+            cursor.execute('SELECT pg_terminate_backend(%s)', [pid])
+
+        self.start_request()
+        new_pid = self.backend_pid(self.connection)
+        self.assertNotEqual(new_pid, pid)
+
+    def test_background_thread_has_its_own_connection(self):
+        """
+        Ensure a thread such as the audit log's flush thread gets a connection while a request holds one
+        """
+        self.start_request()
+        pid = self.backend_pid(self.connection)
+        pids = []
+
+        def flush():
+            connection = self.connections['pooled']
+            try:
+                pids.append(self.backend_pid(connection))
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=flush)
+        thread.start()
+        thread.join()
+        self.assertEqual(len(pids), 1)
+        self.assertNotEqual(pids[0], pid)
@@ -0,0 +1,67 @@
+import json
+
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from django.core.urlresolvers import reverse
+from api.tests.base import UsersTestCase
+
+User = get_user_model()
+
+class UserExportTestCase(UsersTestCase):
+    def setUp(self):
+        super(UserExportTestCase, self).setUp()
+        self.url = reverse('v1:user-export')
+
+    def expected_users(self):
+        return [
+            {
+                'id': user.id,
+                'username': user.username,
+                'email': user.email,
+                'first_name': user.first_name,
+                'last_name': user.last_name,
+            }
+            for user in User.objects.order_by('id')
+        ]
+
+    def test_anon_cannot_export(self):
+        """
+        Ensure anonymous users cannot export the user table
+        """
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_cannot_export(self):
+        """
+        Ensure regular users cannot export the user table
+        """
+        self.login_user()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_admin_can_export_json(self):
+        """
+        Ensure admins can stream every user as a JSON array
+        """
+        self.login_admin_user()
+        with self.settings(API_USER_EXPORT={'CHUNK_SIZE': 1}):
+            response = self.client.get(self.url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertTrue(response.streaming)
+            self.assertEqual(response['Content-Type'], 'application/json')
+            content = b''.join(response.streaming_content).decode('utf-8')
+        self.assertEqual(json.loads(content), self.expected_users())
+
+    def test_admin_can_export_ndjson(self):
+        """
+        Ensure admins can stream every user as NDJSON
+        """
+        self.login_admin_user()
+        with self.settings(API_USER_EXPORT={'CHUNK_SIZE': 2}):
+            response = self.client.get(self.url, {'format': 'ndjson'})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+            content = b''.join(response.streaming_content).decode('utf-8')
+        self.assertTrue(content.endswith('\n'))
+        users = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(users, self.expected_users())
@@ -0,0 +1,111 @@
+import datetime
+import sys
+from unittest import skipUnless
+from urllib.parse import urlencode
+
+from rest_framework.request import Request
+from rest_framework.test import APITestCase, APIRequestFactory
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.utils import timezone
+from api.filters import UserFilterBackend, prefix_upper_bound
+
+User = get_user_model()
+
+class UserFilterTestCase(APITestCase):
+    def setUp(self):
+        self.password = 'johnpassword'
+        joined = timezone.make_aware(datetime.datetime(2015, 1, 1))
+        for i, (username, email) in enumerate((
+                ('john', 'lennon@thebeatles.com'),
+                ('JoeCocker', 'joe@Example.com'),
+                ('paul', 'mccartney@thebeatles.com'),
+                ('george', 'george@example.com'))):
+            user = User.objects.create_user(username, email, self.password)
+            user.date_joined = joined + datetime.timedelta(days=i)
+            user.is_active = username != 'george'
+            user.save()
+        admin = User.objects.create_user('admin', 'admin@govtracker.ca', self.password)
+        admin.is_staff = True
+        admin.save()
+        url = reverse('obtain_jwt_token')
+        data = {
+            'username': 'admin',
+            'password': self.password
+        }
+        response = self.client.post(url, data, format='json')
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + response.data['token'])
+
+    def get_usernames(self, query):
+        response = self.client.get(reverse('v1:user-list') + '?' + query, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return sorted(user['username'] for user in response.data['results'])
+
+    def test_filter_by_username_prefix(self):
+        """
+        Ensure users can be found by a case-insensitive username prefix
+        """
+        self.assertEqual(self.get_usernames('username=JO'), ['JoeCocker', 'john'])
+        self.assertEqual(self.get_usernames('username=joh'), ['john'])
+
+    def test_filter_by_username_prefix_ending_in_last_code_point(self):
+        """
+        Ensure a prefix ending in U+10FFFF still filters instead of failing
+        """
+        last = chr(sys.maxunicode)
+        self.assertEqual(prefix_upper_bound('jo' + last), 'jp')
+        self.assertIsNone(prefix_upper_bound(last))
+        self.assertEqual(prefix_upper_bound('a\ud7ff'), 'a\ue000')
+        self.assertEqual(self.get_usernames(urlencode({'username': 'jo' + last})), [])
+        self.assertEqual(self.get_usernames(urlencode({'username': last})), [])
+
+    def test_filter_by_email_domain(self):
+        """
+        Ensure users can be found by a case-insensitive email domain
+        """
+        self.assertEqual(self.get_usernames('email_domain=example.com'), ['JoeCocker', 'george'])
+
+    def test_filter_by_activity_and_join_date(self):
+        """
+        Ensure users can be filtered by is_active and a date_joined range
+        """
+        self.assertEqual(self.get_usernames('is_active=false'), ['george'])
+        self.assertEqual(self.get_usernames('joined_after=2015-01-02&joined_before=2015-01-04'),
+                         ['JoeCocker', 'paul'])
+        self.assertEqual(self.get_usernames('is_active=true&joined_after=2015-01-02&joined_before=2015-01-05'),
+                         ['JoeCocker', 'paul'])
+
+    def test_search(self):
+        """
+        Ensure search matches anywhere in the username or email
+        """
+        self.assertEqual(self.get_usernames('search=beatles'), ['john', 'paul'])
+        self.assertEqual(self.get_usernames('search=cock'), ['JoeCocker'])
+
+    def test_invalid_filters_are_rejected(self):
+        """
+        Ensure malformed filter values are an error
+        """
+        url = reverse('v1:user-list')
+        response = self.client.get(url + '?is_active=maybe', format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(url + '?joined_after=yesterday', format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @skipUnless(connection.vendor == 'sqlite', 'SQLite query plan')
+    def test_filters_use_indexes(self):
+        """
+        Ensure the username and email domain filters are answered from indexes
+        """
+        backend = UserFilterBackend()
+        for query, index in (('username=jo', 'api_user_username_lower'),
+                             ('email_domain=example.com', 'api_user_email_domain')):
+            request = Request(APIRequestFactory().get('/?' + query))
+            queryset = backend.filter_queryset(request, User.objects.order_by('id'), None)[:101]
+            sql, params = queryset.query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+                plan = ' '.join(str(row) for row in cursor.fetchall())
+            self.assertIn(index, plan)
@@ -0,0 +1,55 @@
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from django.core.urlresolvers import reverse
+
+User = get_user_model()
+
+class PasswordHashingTestCase(APITestCase):
+    def setUp(self):
+        self.password = 'johnpassword'
+
+    def login(self):
+        url = reverse('obtain_jwt_token')
+        data = {
+            'username': 'john',
+            'password': self.password
+        }
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_tests_use_fast_hasher(self):
+        """
+        Ensure the test suite does not pay for a slow hasher
+        """
+        user = User.objects.create_user('john', 'lennon@thebeatles.com', self.password)
+        self.assertTrue(user.password.startswith('md5$'))
+
+    def test_login_rehashes_with_new_cost(self):
+        """
+        Ensure a changed iteration count is applied on the next login
+        """
+        hashers = ('api.hashers.TunablePBKDF2PasswordHasher',)
+        with self.settings(PASSWORD_HASHERS=hashers, API_PASSWORD_HASHING={'PBKDF2_ITERATIONS': 1000}):
+            User.objects.create_user('john', 'lennon@thebeatles.com', self.password)
+            self.assertTrue(User.objects.get(username='john').password.startswith('pbkdf2_sha256$1000$'))
+
+        with self.settings(PASSWORD_HASHERS=hashers, API_PASSWORD_HASHING={'PBKDF2_ITERATIONS': 2000}):
+            self.login()
+            user = User.objects.get(username='john')
+            self.assertTrue(user.password.startswith('pbkdf2_sha256$2000$'))
+            self.assertTrue(user.check_password(self.password))
+
+    def test_login_rehashes_with_new_hasher(self):
+        """
+        Ensure passwords move to the chosen hasher on the next login
+        """
+        hashers = ('api.hashers.TunablePBKDF2PasswordHasher', 'django.contrib.auth.hashers.MD5PasswordHasher')
+        with self.settings(PASSWORD_HASHERS=hashers, API_PASSWORD_HASHING={'PBKDF2_ITERATIONS': 1000}):
+            User.objects.create_user('john', 'lennon@thebeatles.com', self.password)
+
+        with self.settings(PASSWORD_HASHERS=tuple(reversed(hashers))):
+            self.login()
+            user = User.objects.get(username='john')
+            self.assertTrue(user.password.startswith('md5$'))
+            self.assertTrue(user.check_password(self.password))
@@ -0,0 +1,68 @@
+import json
+
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from django.core.urlresolvers import reverse
+from django.test import override_settings
+from api.tests.base import UsersTestCase
+
+User = get_user_model()
+
+INSTRUMENT_ALL = {'ENABLED': True, 'SAMPLE_RATE': 1, 'HEADER': True, 'LOG': True}
+
+@override_settings(API_INSTRUMENTATION=INSTRUMENT_ALL)
+class ServerTimingTestCase(UsersTestCase):
+    def setUp(self):
+        super(ServerTimingTestCase, self).setUp()
+        self.login_user()
+
+    def get_metrics(self, response):
+        return [metric.split(';')[0] for metric in response['Server-Timing'].split(', ')]
+
+    def test_sampled_request_has_server_timing(self):
+        """
+        Ensure a sampled request reports its timings in a Server-Timing header
+        """
+        url = reverse('v1:user-detail', args=(self.user.pk,))
+        response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        metrics = self.get_metrics(response)
+        for name in ('auth', 'perm', 'serialize', 'sql', 'total'):
+            self.assertIn(name, metrics)
+        self.assertEqual(metrics[-1], 'total')
+
+    def test_unsampled_request_has_no_server_timing(self):
+        """
+        Ensure requests outside the sample are not instrumented
+        """
+        url = reverse('v1:user-detail', args=(self.user.pk,))
+        with self.settings(API_INSTRUMENTATION=dict(INSTRUMENT_ALL, SAMPLE_RATE=0)):
+            response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    def test_server_timing_header_can_be_disabled(self):
+        """
+        Ensure a sampled request is only logged when the header is disabled
+        """
+        url = reverse('v1:user-detail', args=(self.user.pk,))
+        with self.settings(API_INSTRUMENTATION=dict(INSTRUMENT_ALL, HEADER=False)):
+            with self.assertLogs('api.performance', 'INFO') as logs:
+                response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.has_header('Server-Timing'))
+        self.assertEqual(len(logs.records), 1)
+
+    def test_sampled_request_is_logged(self):
+        """
+        Ensure a sampled request logs one structured line
+        """
+        url = reverse('v1:user-detail', args=(self.user.pk,))
+        with self.assertLogs('api.performance', 'INFO') as logs:
+            response = self.client.get(url, format='json')
+        self.assertEqual(len(logs.records), 1)
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line['path'], url)
+        self.assertEqual(line['status'], response.status_code)
+        self.assertIn('sql', line['timings'])
+        self.assertIn('total', line['timings'])
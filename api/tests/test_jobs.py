@@ -0,0 +1,141 @@
+import datetime
+import signal
+
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.core import mail
+from django.core.management import call_command
+from django.core.urlresolvers import reverse
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from api import jobs
+from api.models import Job
+
+class JobQueueTestCase(TestCase):
+    def setUp(self):
+        self.calls = []
+        jobs.job('test_record')(self.calls.append)
+        jobs.job('test_fail')(self.fail_job)
+        self.addCleanup(jobs._handlers.pop, 'test_record')
+        self.addCleanup(jobs._handlers.pop, 'test_fail')
+
+    def fail_job(self, payload):
+        raise RuntimeError("Out of luck")
+
+    def test_job_runs_once_committed(self):
+        """
+        Ensure jobs queued in a rolled back transaction never run, and committed ones do
+        """
+        try:
+            with transaction.atomic():
+                jobs.enqueue('test_record', {'n': 1})
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        jobs.enqueue('test_record', {'n': 2})
+        self.assertEqual(jobs.run_due_jobs('worker'), 1)
+        self.assertEqual(self.calls, [{'n': 2}])
+        self.assertFalse(Job.objects.exists())
+
+    def test_unknown_job_is_rejected(self):
+        """
+        Ensure only jobs with a handler can be queued
+        """
+        with self.assertRaises(ValueError):
+            jobs.enqueue('test_missing')
+
+    def test_claims_are_disjoint(self):
+        """
+        Ensure two workers never claim the same job, and that delayed jobs wait
+        """
+        for i in range(3):
+            jobs.enqueue('test_record', {'n': i})
+        jobs.enqueue('test_record', {'n': 3}, delay=60)
+        first = jobs.claim_jobs('first', 2)
+        second = jobs.claim_jobs('second', 10)
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(second), 1)
+        self.assertFalse(set(job.pk for job in first) & set(job.pk for job in second))
+        self.assertEqual(jobs.claim_jobs('third', 10), [])
+
+    def test_expired_lease_is_claimed_again(self):
+        """
+        Ensure the jobs of a worker that died are claimed again once its lease runs out
+        """
+        jobs.enqueue('test_record')
+        claimed = jobs.claim_jobs('dead', 1)[0]
+        Job.objects.filter(pk=claimed.pk).update(locked_until=timezone.now() - datetime.timedelta(seconds=1))
+        reclaimed = jobs.claim_jobs('alive', 1)
+        self.assertEqual([job.pk for job in reclaimed], [claimed.pk])
+        self.assertEqual(reclaimed[0].attempts, 2)
+        # The first worker's claim is gone, it cannot finish the job anymore
+        self.assertTrue(jobs.run_job(claimed))
+        self.assertTrue(Job.objects.filter(pk=claimed.pk).exists())
+
+    @override_settings(API_JOBS={'MAX_ATTEMPTS': 2, 'BACKOFF_SECONDS': 10})
+    def test_failed_job_is_retried_with_backoff(self):
+        """
+        Ensure a failing job is retried later, and kept as failed once out of attempts
+        """
+        jobs.enqueue('test_fail')
+        start = timezone.now()
+        self.assertEqual(jobs.run_due_jobs('worker'), 1)
+        job = Job.objects.get()
+        self.assertEqual(job.attempts, 1)
+        self.assertTrue(start + datetime.timedelta(seconds=10) <= job.run_at <= start + datetime.timedelta(seconds=13))
+        self.assertEqual(job.locked_by, '')
+        self.assertTrue('Out of luck' in job.last_error)
+        self.assertEqual(jobs.run_due_jobs('worker'), 0)
+
+        Job.objects.update(run_at=timezone.now())
+        jobs.run_due_jobs('worker')
+        job = Job.objects.get()
+        self.assertEqual(job.attempts, 2)
+        self.assertIsNotNone(job.failed_at)
+        Job.objects.update(run_at=timezone.now())
+        self.assertEqual(jobs.run_due_jobs('worker'), 0)
+
+    def test_stopping_releases_the_batch(self):
+        """
+        Ensure a stopping worker gives back the jobs it has not run
+        """
+        jobs.enqueue('test_record')
+        jobs.run_due_jobs('worker', should_stop=lambda: True)
+        self.assertEqual(self.calls, [])
+        job = Job.objects.get()
+        self.assertEqual((job.attempts, job.locked_by, job.locked_until), (0, '', None))
+
+    def test_run_jobs_restores_signal_handlers(self):
+        """
+        Ensure the run_jobs command gives SIGINT and SIGTERM back to their handlers on exit
+        """
+        handlers = {signum: signal.getsignal(signum) for signum in (signal.SIGINT, signal.SIGTERM)}
+        jobs.enqueue('test_record')
+        call_command('run_jobs', once=True)
+        self.assertEqual(len(self.calls), 1)
+        for signum, handler in handlers.items():
+            self.assertEqual(signal.getsignal(signum), handler)
+
+@override_settings(ADMINS=[('Admin', 'admin@thebeatles.com')])
+class SignupJobTestCase(APITestCase):
+    def test_signup_notifies_admins(self):
+        """
+        Ensure a sign-up queues a job that tells the admins, run by the run_jobs command
+        """
+        url = reverse('v1:user-list')
+        data = {
+            'username': 'rstar',
+            'email': 'star@thebeatles.com',
+            'new_password1': 'booyah',
+            'new_password2': 'booyah'
+        }
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(Job.objects.get().name, 'notify_signup')
+
+        call_command('run_jobs', once=True)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertTrue('rstar' in mail.outbox[0].body)
+        self.assertFalse(Job.objects.exists())
@@ -0,0 +1,37 @@
+from rest_framework import status
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.urlresolvers import reverse
+from django.test import override_settings
+from api.tests.base import UsersTestCase
+
+User = get_user_model()
+
+@override_settings(MIDDLEWARE_CLASSES=settings.API_MODE_MIDDLEWARE_CLASSES)
+class APIModeTestCase(UsersTestCase):
+    def test_api_skips_session_middleware(self):
+        """
+        Ensure API requests are served without sessions
+        """
+        self.login_user()
+
+        url = reverse('v1:user-detail', args=('current',))
+        response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['username'], self.user.username)
+        self.assertTrue(response.wsgi_request.stateless_api)
+        self.assertFalse(hasattr(response.wsgi_request, 'session'))
+
+    def test_full_stack_paths_keep_sessions(self):
+        """
+        Ensure the admin and browsable API login keep the full stack
+        """
+        for url in ('/admin/', '/api/drf/auth/login/'):
+            response = self.client.get(url)
+            self.assertFalse(response.wsgi_request.stateless_api)
+            self.assertTrue(hasattr(response.wsgi_request, 'session'))
+            self.assertTrue(hasattr(response.wsgi_request, 'user'))
+
+        self.assertTrue(self.client.login(username=self.user.username, password=self.password))
+        response = self.client.get('/admin/')
+        self.assertTrue(response.wsgi_request.user.is_authenticated())
@@ -0,0 +1,116 @@
+import datetime
+import decimal
+import json
+
+import msgpack
+from rest_framework.renderers import JSONRenderer
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from django.core.urlresolvers import reverse
+from django.test import SimpleTestCase
+from api.renderers import MessagePackRenderer
+from api.tests.base import UsersTestCase
+
+User = get_user_model()
+
+MSGPACK = 'application/msgpack'
+
+class MessagePackTestCase(UsersTestCase):
+    def post_msgpack(self, url, data):
+        return self.client.post(url, msgpack.packb(data, use_bin_type=True), content_type=MSGPACK,
+                                HTTP_ACCEPT=MSGPACK)
+
+    def unpack(self, response):
+        self.assertEqual(response['Content-Type'], MSGPACK)
+        return msgpack.unpackb(response.content, raw=False)
+
+    def test_can_login(self):
+        """
+        Ensure the JWT views accept and answer MessagePack
+        """
+        response = self.post_msgpack(reverse('obtain_jwt_token'), {
+            'username': self.user.username,
+            'password': self.password
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = self.unpack(response)
+        self.assertEqual(data['user']['username'], 'john')
+
+        response = self.post_msgpack(reverse('verify_jwt_token'), {'token': data['token']})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.unpack(response)['token'], data['token'])
+
+    def test_same_data_as_json(self):
+        """
+        Ensure MessagePack responses hold the same data as JSON ones
+        """
+        token = self.client.post(reverse('obtain_jwt_token'), {
+            'username': self.user.username,
+            'password': self.password
+        }, format='json').data['token']
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + token)
+        url = reverse('v1:user-detail', args=('current',))
+        as_json = json.loads(self.client.get(url, HTTP_ACCEPT='application/json').content.decode('utf-8'))
+        response = self.client.get(url, HTTP_ACCEPT=MSGPACK)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.unpack(response), as_json)
+
+        response = self.client.get(url, {'format': 'msgpack'})
+        self.assertEqual(self.unpack(response), as_json)
+
+    def test_can_create_user(self):
+        """
+        Ensure a user can be created from a MessagePack body
+        """
+        response = self.post_msgpack(reverse('v1:user-list'), {
+            'username': 'ringo',
+            'email': 'starr@thebeatles.com',
+            'new_password1': 'ringopassword',
+            'new_password2': 'ringopassword',
+            'first_name': 'Ringo',
+            'last_name': 'Starr'
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.unpack(response)['username'], 'ringo')
+        self.assertTrue(User.objects.filter(username='ringo').exists())
+
+    def test_malformed_body_is_rejected(self):
+        """
+        Ensure a body that is not MessagePack is a 400
+        """
+        response = self.client.post(reverse('obtain_jwt_token'), b'\xc1\x00', content_type=MSGPACK,
+                                    HTTP_ACCEPT=MSGPACK)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue('detail' in self.unpack(response))
+
+    def test_oversized_lengths_are_rejected(self):
+        """
+        Ensure a body claiming a longer string or array than it holds is a 400
+        """
+        for body in (b'\xdb\x7f\xff\xff\xffjohn', b'\xdd\x7f\xff\xff\xff\x00'):
+            response = self.client.post(reverse('obtain_jwt_token'), body, content_type=MSGPACK,
+                                        HTTP_ACCEPT=MSGPACK)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_admin_can_export_msgpack(self):
+        """
+        Ensure the export streams one MessagePack map per user
+        """
+        self.login_admin_user()
+        with self.settings(API_USER_EXPORT={'CHUNK_SIZE': 1}):
+            response = self.client.get(reverse('v1:user-export'), {'format': 'msgpack'})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response['Content-Type'], MSGPACK)
+            unpacker = msgpack.Unpacker(raw=False)
+            unpacker.feed(b''.join(response.streaming_content))
+        self.assertEqual([user['username'] for user in unpacker],
+                         list(User.objects.order_by('id').values_list('username', flat=True)))
+
+class MessagePackRendererTestCase(SimpleTestCase):
+    def test_round_trips_like_json(self):
+        """
+        Ensure types MessagePack lacks are rendered as JSON would
+        """
+        data = {'joined': datetime.datetime(2015, 1, 2, 3, 4, 5), 'score': decimal.Decimal('1.5'), 'ids': (1, 2)}
+        rendered = msgpack.unpackb(MessagePackRenderer().render(data), raw=False)
+        self.assertEqual(rendered, json.loads(JSONRenderer().render(data).decode('utf-8')))
@@ -0,0 +1,79 @@
+import datetime
+
+from rest_framework import status
+from rest_framework_jwt.settings import api_settings
+from django.contrib.auth import get_user_model
+from django.core.urlresolvers import reverse
+from django.test import TestCase
+from django.utils import timezone
+from api.models import RevokedToken
+from api.revocation import RevocationList, revocation_list
+from api.tests.base import UsersTestCase
+
+User = get_user_model()
+
+class LogoutTestCase(UsersTestCase):
+    def test_logout_revokes_token(self):
+        """
+        Ensure a token stops working once its holder logs out
+        """
+        token = self.get_token(self.user.username, self.password)
+        other_token = self.get_token(self.user.username, self.password)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + token)
+        response = self.client.post(reverse('logout_jwt_token'), format='json')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertTrue(RevokedToken.objects.exists())
+
+        url = reverse('v1:user-detail', args=('current',))
+        response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        for name in ('refresh_jwt_token', 'verify_jwt_token'):
+            response = self.client.post(reverse(name), {'token': token}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # Other sessions of the same user are not affected
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + other_token)
+        response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_anon_cannot_logout(self):
+        """
+        Ensure logging out requires a token
+        """
+        response = self.client.post(reverse('logout_jwt_token'), format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_check_skips_database(self):
+        """
+        Ensure checking a token against the revocation list runs no query
+        """
+        token = self.get_token(self.user.username, self.password)
+        revocation_list.refresh()
+        with self.assertNumQueries(0):
+            api_settings.JWT_DECODE_HANDLER(token)
+
+class RevocationListTestCase(TestCase):
+    def setUp(self):
+        self.revocation_list = RevocationList({'REFRESH_INTERVAL': 3600})
+        self.expires = timezone.now() + datetime.timedelta(hours=1)
+
+    def test_incremental_refresh(self):
+        """
+        Ensure tokens revoked by other workers are picked up on the next refresh
+        """
+        self.assertFalse(self.revocation_list.is_revoked('a'))
+        RevokedToken.objects.create(jti='a', expires=self.expires)
+        self.assertFalse(self.revocation_list.is_revoked('a'))
+        self.revocation_list.refresh()
+        self.assertTrue(self.revocation_list.is_revoked('a'))
+
+    def test_full_refresh_drops_expired_tokens(self):
+        """
+        Ensure a full refresh forgets tokens that have expired
+        """
+        RevokedToken.objects.create(jti='a', expires=self.expires)
+        self.revocation_list.add('b', timezone.now() - datetime.timedelta(seconds=1))
+        self.revocation_list.refresh(full=True)
+        self.assertTrue(self.revocation_list.is_revoked('a'))
+        self.assertFalse(self.revocation_list.is_revoked('b'))
+        self.assertEqual(len(self.revocation_list), 1)
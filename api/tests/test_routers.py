@@ -0,0 +1,100 @@
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from django.core.urlresolvers import reverse
+from django.test import SimpleTestCase, RequestFactory, override_settings
+from api.middleware import ReplicaRoutingMiddleware
+from api.models import TokenVersion
+from api.routers import PrimaryReplicaRouter, reset_routing, use_primary
+from api.tests.base import UsersTestCase
+
+User = get_user_model()
+
+@override_settings(API_DATABASE_ROUTING={'REPLICAS': ('replica',)})
+class PrimaryReplicaRouterTestCase(SimpleTestCase):
+    def setUp(self):
+        reset_routing()
+        self.router = PrimaryReplicaRouter()
+
+    def tearDown(self):
+        reset_routing()
+
+    def test_reads_go_to_replica(self):
+        """
+        Ensure reads go to a replica and writes to the primary
+        """
+        self.assertEqual(self.router.db_for_read(User), 'replica')
+        self.assertEqual(self.router.db_for_write(User), 'default')
+
+    def test_reads_after_write_go_to_primary(self):
+        """
+        Ensure reads stick to the primary once the request has written
+        """
+        self.router.db_for_write(User)
+        self.assertEqual(self.router.db_for_read(User), 'default')
+        reset_routing()
+        self.assertEqual(self.router.db_for_read(User), 'replica')
+
+    def test_use_primary(self):
+        """
+        Ensure reads inside use_primary() go to the primary
+        """
+        with use_primary():
+            self.assertEqual(self.router.db_for_read(User), 'default')
+        self.assertEqual(self.router.db_for_read(User), 'replica')
+
+    def test_write_in_use_primary_keeps_primary(self):
+        """
+        Ensure a write inside use_primary() keeps later reads on the primary
+        """
+        with use_primary():
+            self.router.db_for_write(User)
+        self.assertEqual(self.router.db_for_read(User), 'default')
+
+    def test_flagged_models_read_from_primary(self):
+        """
+        Ensure models flagged read_from_primary never read from a replica
+        """
+        self.assertEqual(self.router.db_for_read(TokenVersion), 'default')
+
+    @override_settings(API_DATABASE_ROUTING={'REPLICAS': ()})
+    def test_without_replicas(self):
+        """
+        Ensure everything goes to the primary when there is no replica
+        """
+        self.assertEqual(self.router.db_for_read(User), 'default')
+
+    def test_middleware_pins_unsafe_methods_and_cookie(self):
+        """
+        Ensure unsafe requests, and requests carrying the pin cookie, read from the primary
+        """
+        middleware = ReplicaRoutingMiddleware()
+        factory = RequestFactory()
+        middleware.process_request(factory.patch('/api/v1/users/current/'))
+        self.assertEqual(self.router.db_for_read(User), 'default')
+        middleware.process_request(factory.get('/api/v1/users/current/'))
+        self.assertEqual(self.router.db_for_read(User), 'replica')
+        request = factory.get('/api/v1/users/current/')
+        request.COOKIES['api_primary'] = '1'
+        middleware.process_request(request)
+        self.assertEqual(self.router.db_for_read(User), 'default')
+
+# A replica alias would not see the test case's transaction, so stand in the
+# primary for it: only the routing decisions are under test
+@override_settings(API_DATABASE_ROUTING={'REPLICAS': ('default',), 'PIN_SECONDS': 5})
+class ReplicaPinningTestCase(UsersTestCase):
+    def setUp(self):
+        super(ReplicaPinningTestCase, self).setUp()
+        self.login_user()
+        self.url = reverse('v1:user-detail', args=('current',))
+
+    def test_write_sets_pin_cookie(self):
+        """
+        Ensure a client that wrote is told to read from the primary for a while
+        """
+        response = self.client.get(self.url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('api_primary', response.cookies)
+
+        response = self.client.patch(self.url, {'first_name': 'Ringo'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.cookies['api_primary']['max-age'], 5)
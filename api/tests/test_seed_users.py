@@ -0,0 +1,41 @@
+from django.contrib.auth import authenticate, get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils.six import StringIO
+
+User = get_user_model()
+
+class SeedUsersTestCase(TestCase):
+    def seed(self, count, **options):
+        options.setdefault('workers', 1)
+        call_command('seed_users', str(count), stdout=StringIO(), **options)
+
+    def test_seed_users(self):
+        """
+        Ensure seeding creates the users in batches, sharing one usable password hash
+        """
+        before = User.objects.count()
+        self.seed(25, batch_size=10, password='seedpassword')
+        seeded = User.objects.order_by('pk')[before:]
+        self.assertEqual(User.objects.count(), before + 25)
+        self.assertEqual(len(set(user.password for user in seeded)), 1)
+        self.assertEqual(authenticate(username=seeded[0].username, password='seedpassword'), seeded[0])
+
+    def test_seed_users_again(self):
+        """
+        Ensure seeding twice with the same seed still gives unique usernames
+        """
+        self.seed(10)
+        self.seed(10)
+        usernames = User.objects.values_list('username', flat=True)
+        self.assertEqual(len(usernames), len(set(usernames)))
+
+    def test_seed_users_options(self):
+        """
+        Ensure a batch size or worker count below one is refused
+        """
+        with self.assertRaises(CommandError):
+            self.seed(10, batch_size=0)
+        with self.assertRaises(CommandError):
+            self.seed(10, workers=0)
@@ -0,0 +1,47 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.serializers import ModelSerializer
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase
+from api.serializers.user import UserSerializer, UserCreateSerializer, USER_READ_FIELDS
+
+User = get_user_model()
+
+class ReferenceUserSerializer(UserSerializer):
+    def to_representation(self, instance):
+        return ModelSerializer.to_representation(self, instance)
+
+class FastRepresentationTestCase(SimpleTestCase):
+    def setUp(self):
+        self.users = [
+            User(pk=1, username='john', email='lennon@thebeatles.com', first_name='John', last_name='Lennon'),
+            User(pk=2, username='ringo', email='', first_name='', last_name=''),
+            User(pk=3, username='rené', email='rené@exemple.ca', first_name='René', last_name='Lévesque'),
+            User(pk=None, username='draft', email=None, first_name='Un"quoted\\', last_name=' '),
+        ]
+
+    def test_plan_covers_read_fields(self):
+        """
+        Ensure the precompiled plan reads exactly the public user fields
+        """
+        plan = UserSerializer().get_representation_plan()
+        self.assertEqual(tuple(name for name, attname, convert in plan), USER_READ_FIELDS)
+        plan = UserCreateSerializer().get_representation_plan()
+        self.assertEqual(tuple(name for name, attname, convert in plan), USER_READ_FIELDS)
+
+    def test_list_output_is_identical(self):
+        """
+        Ensure the fast path renders the same bytes as the full serializer
+        """
+        renderer = JSONRenderer()
+        expected = renderer.render(ReferenceUserSerializer(self.users, many=True).data)
+        self.assertEqual(renderer.render(UserSerializer(self.users, many=True).data), expected)
+
+    def test_detail_output_is_identical(self):
+        """
+        Ensure single instances render the same bytes as the full serializer
+        """
+        renderer = JSONRenderer()
+        for user in self.users:
+            expected = renderer.render(ReferenceUserSerializer(user).data)
+            self.assertEqual(renderer.render(UserSerializer(user).data), expected)
+            self.assertEqual(renderer.render(UserCreateSerializer(user).data), expected)
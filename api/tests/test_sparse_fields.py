@@ -0,0 +1,83 @@
+import json
+
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from api.tests.base import UsersTestCase
+
+User = get_user_model()
+
+class SparseFieldsTestCase(UsersTestCase):
+    def test_can_pick_fields(self):
+        """
+        Ensure ?fields= renders only the fields asked for
+        """
+        self.login_user()
+        url = reverse('v1:user-detail', args=('current',))
+        response = self.client.get(url + '?fields=id,username', format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'id': self.user.pk, 'username': 'john'})
+
+    def test_can_exclude_fields(self):
+        """
+        Ensure ?exclude= leaves out the fields asked for
+        """
+        self.login_user()
+        url = reverse('v1:user-detail', args=('current',))
+        response = self.client.get(url + '?exclude=email,last_name', format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(response.data), ['id', 'username', 'first_name'])
+
+    def test_unknown_field_is_rejected(self):
+        """
+        Ensure asking for a field the endpoint does not have is an error
+        """
+        self.login_user()
+        url = reverse('v1:user-detail', args=('current',))
+        response = self.client.get(url + '?fields=id,current_password', format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue('fields' in response.data)
+
+    def test_fields_narrow_the_query(self):
+        """
+        Ensure only the columns of the picked fields are selected
+        """
+        self.login_admin_user()
+        url = reverse('v1:user-list')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url + '?fields=id,username', format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data['results'][0]), {'id', 'username'})
+        sql = queries.captured_queries[-1]['sql']
+        self.assertTrue('"username"' in sql)
+        self.assertFalse('"email"' in sql)
+
+        url = reverse('v1:user-detail', args=(self.user.pk,))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url + '?fields=email', format='json')
+        self.assertEqual(response.data, {'email': self.user.email})
+        sql = queries.captured_queries[-1]['sql']
+        self.assertFalse('"username"' in sql)
+
+    def test_writes_ignore_fields(self):
+        """
+        Ensure ?fields= does not restrict what can be updated
+        """
+        self.login_user()
+        url = reverse('v1:user-detail', args=('current',))
+        response = self.client.patch(url + '?fields=id', {'first_name': 'Ringo'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['first_name'], 'Ringo')
+
+    def test_export_fields(self):
+        """
+        Ensure the export honours ?fields= too
+        """
+        self.login_admin_user()
+        url = reverse('v1:user-export')
+        response = self.client.get(url + '?fields=id', format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = json.loads(b''.join(response.streaming_content).decode('utf-8'))
+        self.assertEqual(set(rows[0]), {'id'})
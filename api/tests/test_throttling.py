@@ -0,0 +1,81 @@
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.urlresolvers import reverse
+from django.test import override_settings
+
+User = get_user_model()
+
+@override_settings(API_THROTTLE={'CACHE': 'throttle', 'RATES': {
+    'login_ip': '3/min',
+    'login_username': '2/min',
+    'user_create': '2/hour',
+}})
+class ThrottlingTestCase(APITestCase):
+    def setUp(self):
+        caches['throttle'].clear()
+        self.password = 'johnpassword'
+        self.user = User.objects.create_user('john', 'lennon@thebeatles.com', self.password, **{
+            'first_name': 'John',
+            'last_name': 'Lennon'
+        })
+
+    def login(self, username, address='10.0.0.1'):
+        url = reverse('obtain_jwt_token')
+        data = {
+            'username': username,
+            'password': self.password
+        }
+        return self.client.post(url, data, format='json', REMOTE_ADDR=address)
+
+    def test_login_is_throttled_per_address(self):
+        """
+        Ensure logins from one address are rejected once over budget
+        """
+        for username in ('john', 'paul', 'george'):
+            self.assertNotEqual(self.login(username).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        with self.assertNumQueries(0):
+            response = self.login('ringo')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertTrue(response.has_header('Retry-After'))
+
+        response = self.login('ringo', address='10.0.0.2')
+        self.assertNotEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_login_is_throttled_per_username(self):
+        """
+        Ensure logins as one user are rejected once over budget, from any address
+        """
+        self.assertEqual(self.login('john', address='10.0.0.1').status_code, status.HTTP_200_OK)
+        self.assertEqual(self.login('John', address='10.0.0.2').status_code, status.HTTP_400_BAD_REQUEST)
+        with self.assertNumQueries(0):
+            response = self.login('john', address='10.0.0.3')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_anon_create_is_throttled(self):
+        """
+        Ensure anonymous sign-ups from one address are rejected once over budget
+        """
+        url = reverse('v1:user-list')
+        for i in range(3):
+            data = {
+                'username': 'user%d' % i,
+                'email': 'user%d@thebeatles.com' % i,
+                'new_password1': self.password,
+                'new_password2': self.password
+            }
+            # Allowed sign-ups check the username, then insert the user and its
+            # notify_signup job in a savepoint
+            with self.assertNumQueries(0 if i == 2 else 5):
+                response = self.client.post(url, data, format='json', REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(User.objects.filter(username__startswith='user').count(), 2)
+
+    @override_settings(API_THROTTLE={'RATES': {}})
+    def test_throttling_can_be_disabled(self):
+        """
+        Ensure scopes without a rate are not throttled
+        """
+        for i in range(5):
+            self.assertEqual(self.login('john').status_code, status.HTTP_200_OK)
@@ -0,0 +1,134 @@
+from rest_framework import status
+from rest_framework_jwt.settings import api_settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+from django.test import override_settings
+from api.revocation import revocation_list
+from api.tokens import VERSION_KEY, get_token_version, revoke_tokens
+from api.tests.base import UsersTestCase
+
+User = get_user_model()
+
+@override_settings(API_JWT_CLAIMS={'ENABLED': True})
+class TokenClaimsTestCase(UsersTestCase):
+    def setUp(self):
+        # Token versions outlive the rolled back rows in the cache
+        cache.clear()
+        super(TokenClaimsTestCase, self).setUp()
+
+    def test_token_carries_claims(self):
+        """
+        Ensure issued tokens carry the staff, active and version claims
+        """
+        payload = api_settings.JWT_DECODE_HANDLER(self.get_token(self.user.username, self.password))
+        self.assertFalse(payload['is_staff'])
+        self.assertTrue(payload['is_active'])
+        self.assertEqual(payload['ver'], 0)
+
+        payload = api_settings.JWT_DECODE_HANDLER(self.get_token(self.adminUser.username, self.adminPassword))
+        self.assertTrue(payload['is_staff'])
+        self.assertEqual(payload['ver'], 0)
+
+        # Promoting john revoked their earlier tokens
+        self.user.is_staff = True
+        self.user.save()
+        payload = api_settings.JWT_DECODE_HANDLER(self.get_token(self.user.username, self.password))
+        self.assertTrue(payload['is_staff'])
+        self.assertEqual(payload['ver'], 1)
+
+    def test_permission_check_skips_user_lookup(self):
+        """
+        Ensure permissions are checked from the claims without loading the user
+        """
+        # Load the revoked tokens now rather than in the first counted request
+        revocation_list.refresh()
+        self.login_user()
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('v1:user-list'), format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.login_admin_user()
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('v1:user-list'), format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_can_get_current_user_from_claims(self):
+        """
+        Ensure views needing the full user still get it
+        """
+        self.login_user()
+        response = self.client.get(reverse('v1:user-detail', args=('current',)), format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['email'], self.user.email)
+
+    def test_can_revoke_tokens(self):
+        """
+        Ensure revoking rejects the user's earlier tokens but not later ones
+        """
+        token = self.get_token(self.user.username, self.password)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + token)
+        url = reverse('v1:user-revoke-tokens', args=('current',))
+        response = self.client.post(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        response = self.client.get(reverse('v1:user-detail', args=('current',)), format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.post(reverse('refresh_jwt_token'), {'token': token}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.login_user()
+        response = self.client.get(reverse('v1:user-detail', args=('current',)), format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_cannot_revoke_other_users_tokens(self):
+        """
+        Ensure users can only revoke their own tokens
+        """
+        self.login_user()
+        url = reverse('v1:user-revoke-tokens', args=(self.adminUser.pk,))
+        response = self.client.post(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_demoting_staff_revokes_tokens(self):
+        """
+        Ensure tokens claiming staff stop working once the user is demoted
+        """
+        self.login_admin_user()
+        self.adminUser.is_staff = False
+        self.adminUser.save()
+        response = self.client.get(reverse('v1:user-list'), format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleting_user_revokes_tokens(self):
+        """
+        Ensure tokens of a deleted user stop working
+        """
+        self.login_admin_user()
+        self.adminUser.delete()
+        response = self.client.get(reverse('v1:user-list'), format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        # Nor do they come back once the cached version has expired
+        cache.clear()
+        response = self.client.get(reverse('v1:user-list'), format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_revocation_outlasts_racing_lookup(self):
+        """
+        Ensure a lookup that read the version before a revocation cannot cache it
+        """
+        self.assertEqual(get_token_version(self.user.pk), 0)
+        revoke_tokens(self.user.pk)
+        # What a lookup that started before the revocation committed would do
+        cache.add(VERSION_KEY % self.user.pk, 0)
+        self.assertEqual(get_token_version(self.user.pk), 1)
+
+    @override_settings(API_JWT_CLAIMS={'ENABLED': False})
+    def test_claims_can_be_disabled(self):
+        """
+        Ensure tokens carry no claims when the option is off
+        """
+        payload = api_settings.JWT_DECODE_HANDLER(self.get_token(self.user.username, self.password))
+        self.assertNotIn('is_staff', payload)
+        self.assertNotIn('ver', payload)
@@ -0,0 +1,106 @@
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from django.core.urlresolvers import reverse
+from django.test import SimpleTestCase, override_settings
+from api.revocation import revocation_list
+from api.user_cache import UserCache, user_cache, get_user_version, bump_user_version
+from api.tests.base import UsersTestCase
+
+User = get_user_model()
+
+class UserCacheTestCase(UsersTestCase):
+    def setUp(self):
+        super(UserCacheTestCase, self).setUp()
+        self.login_user()
+        self.url = reverse('v1:user-detail', args=('current',))
+
+    def test_cached_user_skips_query(self):
+        """
+        Ensure a cached user is not loaded from the database again
+        """
+        # Load the revoked tokens now rather than in the first counted request
+        revocation_list.refresh()
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['username'], self.user.username)
+
+    def test_save_invalidates_cached_user(self):
+        """
+        Ensure saving a user takes effect on the next request
+        """
+        response = self.client.get(self.url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.user.first_name = 'Ringo'
+        self.user.save()
+        response = self.client.get(self.url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['first_name'], 'Ringo')
+
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(self.url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_delete_invalidates_cached_user(self):
+        """
+        Ensure a deleted user can no longer authenticate
+        """
+        response = self.client.get(self.url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.user.delete()
+        response = self.client.get(self.url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(API_USER_CACHE={'ENABLED': False})
+    def test_disabled_cache_loads_user(self):
+        """
+        Ensure the user is loaded on every request when the cache is off
+        """
+        self.assertFalse(user_cache.enabled)
+        revocation_list.refresh()
+        for i in range(2):
+            with self.assertNumQueries(1):
+                response = self.client.get(self.url, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+class UserCacheEvictionTestCase(SimpleTestCase):
+    def test_least_recently_used_is_evicted(self):
+        """
+        Ensure the cache never grows past its bound
+        """
+        cache = UserCache({'MAX_ENTRIES': 2})
+        users = [User(pk=pk, username='user%d' % pk) for pk in range(1, 4)]
+        cache.set('user1', users[0], get_user_version(1))
+        cache.set('user2', users[1], get_user_version(2))
+        self.assertEqual(cache.get('user1').pk, 1)
+        cache.set('user3', users[2], get_user_version(3))
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('user2'))
+        self.assertEqual(cache.get('user1').username, 'user1')
+        self.assertEqual(cache.get('user3').username, 'user3')
+
+    def test_expired_entries_are_dropped(self):
+        """
+        Ensure entries are not served past their timeout
+        """
+        cache = UserCache({'TIMEOUT': -1})
+        cache.set('user1', User(pk=1, username='user1'), get_user_version(1))
+        self.assertIsNone(cache.get('user1'))
+        self.assertEqual(len(cache), 0)
+
+    def test_stale_version_is_dropped(self):
+        """
+        Ensure an entry cached under an older version is not served
+        """
+        cache = UserCache()
+        version = get_user_version(1)
+        bump_user_version(1)
+        cache.set('user1', User(pk=1, username='user1'), version)
+        self.assertIsNone(cache.get('user1'))
@@ -2,6 +2,7 @@ from rest_framework.test import APITestCase
 from rest_framework import status
 from django.contrib.auth import get_user_model
 from django.core.urlresolvers import reverse
+from api.revocation import revocation_list
 
 User = get_user_model()
 
@@ -79,14 +80,14 @@ class UsersViewTestCase(APITestCase):
         url = reverse('v1:user-list')
         response = self.client.get(url, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
-        user = response.data[0]
+        self.assertEqual(len(response.data['results']), 2)
+        user = response.data['results'][0]
         self.assertEqual(user['username'], self.user.username)
         self.assertEqual(user['email'], self.user.email)
         self.assertEqual(user['first_name'], self.user.first_name)
         self.assertEqual(user['last_name'], self.user.last_name)
 
-        user = response.data[1]
+        user = response.data['results'][1]
         self.assertEqual(user['username'], self.adminUser.username)
         self.assertEqual(user['email'], self.adminUser.email)
         self.assertEqual(user['first_name'], self.adminUser.first_name)
@@ -477,3 +478,67 @@ class UsersViewTestCase(APITestCase):
         response = self.client.post(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertTrue('non_field_errors' in response.data)
+
+    def test_current_user_is_loaded_once(self):
+        """
+        Ensure the current user is authenticated and loaded only once
+        """
+        self.login_user()
+        # Load the revoked tokens now rather than in the first counted request
+        revocation_list.refresh()
+
+        url = reverse('v1:user-detail', args=('current',))
+        with self.assertNumQueries(1):
+            response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['id'], self.user.id)
+
+        data = {
+            'first_name': 'Ringo',
+        }
+        with self.assertNumQueries(1):
+            response = self.client.patch(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['first_name'], 'Ringo')
+
+    def test_anon_cannot_get_current_user(self):
+        """
+        Ensure the current user lookup requires authentication
+        """
+        url = reverse('v1:user-detail', args=('current',))
+        response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_admin_can_page_through_user_list(self):
+        """
+        Ensure the user list is paginated with a cursor
+        """
+        self.login_admin_user()
+
+        url = reverse('v1:user-list')
+        response = self.client.get(url, {'page_size': 1}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNone(response.data['previous'])
+        ids = [user['id'] for user in response.data['results']]
+
+        while response.data['next']:
+            response = self.client.get(response.data['next'], format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data['results']), 1)
+            ids.extend(user['id'] for user in response.data['results'])
+
+        self.assertEqual(ids, list(User.objects.order_by('id').values_list('id', flat=True)))
+
+    def test_user_list_page_size_is_capped(self):
+        """
+        Ensure clients cannot ask for more than the maximum page size
+        """
+        self.login_admin_user()
+
+        url = reverse('v1:user-list')
+        with self.settings(API_USER_PAGINATION={'PAGE_SIZE': 1, 'MAX_PAGE_SIZE': 2}):
+            response = self.client.get(url, format='json')
+            self.assertEqual(len(response.data['results']), 1)
+            response = self.client.get(url, {'page_size': 100}, format='json')
+            self.assertEqual(len(response.data['results']), 2)
@@ -0,0 +1,19 @@
+from django.core.urlresolvers import get_resolver
+from django.test import SimpleTestCase
+from django.utils.translation import get_language
+from api.serializers.user import UserSerializer, UserCreateSerializer
+from govtracker.warmup import build_serializers, compile_urls
+
+class WarmUpTestCase(SimpleTestCase):
+    def test_builds_urls_and_serializers(self):
+        """
+        Ensure the warm-up populates the URL resolvers and the representation plans
+        """
+        for serializer_class in (UserSerializer, UserCreateSerializer):
+            if '_representation_plans' in vars(serializer_class):
+                del serializer_class._representation_plans
+        compile_urls()
+        build_serializers()
+        self.assertTrue(get_language() in get_resolver(None)._reverse_dict)
+        self.assertTrue(vars(UserSerializer)['_representation_plans'][None])
+        self.assertTrue('_representation_plans' in vars(UserCreateSerializer))
@@ -0,0 +1,100 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import SimpleRateThrottle
+
+DEFAULTS = {
+    # Cache holding the counters, shared by all workers using it. Its
+    # backend must increment atomically, or concurrent requests lose counts
+    'CACHE': 'default',
+    # Budgets per scope, as '<requests>/<period>'. Scopes without a rate are
+    # not throttled
+    'RATES': {},
+}
+
+def get_throttle_option(name):
+    return getattr(settings, 'API_THROTTLE', {}).get(name, DEFAULTS[name])
+
+class CounterRateThrottle(SimpleRateThrottle):
+    """
+    Fixed-window rate throttle keeping a single counter per key.
+
+    Unlike DRF's `SimpleRateThrottle`, which reads and rewrites the list of
+    recent request times, each request costs one cache increment, and the
+    rate and cache are read from `API_THROTTLE` when the throttle is built.
+    """
+
+    def __init__(self):
+        self.cache = caches[get_throttle_option('CACHE')]
+        super(CounterRateThrottle, self).__init__()
+
+    def get_rate(self):
+        return get_throttle_option('RATES').get(self.scope)
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        now = self.timer()
+        window = int(now // self.duration)
+        self.wait_seconds = (window + 1) * self.duration - now
+        key = '%s:%d' % (self.key, window)
+        self.cache.add(key, 0, self.duration)
+        try:
+            count = self.cache.incr(key)
+        except ValueError:
+            # Evicted between the add and the increment
+            count = 1
+            self.cache.set(key, count, self.duration)
+        return count <= self.num_requests
+
+    def wait(self):
+        return self.wait_seconds
+
+class LoginIPThrottle(CounterRateThrottle):
+    """
+    Limit login attempts per client address.
+    """
+    scope = 'login_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': self.get_ident(request)
+        }
+
+class LoginUsernameThrottle(CounterRateThrottle):
+    """
+    Limit login attempts per username, whatever address they come from.
+    """
+    scope = 'login_username'
+
+    def get_cache_key(self, request, view):
+        username = request.data.get('username') if hasattr(request.data, 'get') else None
+        if not username:
+            return None
+        # Hashed, as usernames may hold characters cache keys cannot
+        ident = hashlib.md5(str(username).strip().lower().encode('utf-8')).hexdigest()
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': ident
+        }
+
+class UserCreateThrottle(CounterRateThrottle):
+    """
+    Limit anonymous sign-ups per client address.
+    """
+    scope = 'user_create'
+
+    def get_cache_key(self, request, view):
+        if getattr(view, 'action', None) != 'create' or request.user.is_authenticated():
+            return None
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': self.get_ident(request)
+        }
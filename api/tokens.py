@@ -0,0 +1,98 @@
+import jwt
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction, IntegrityError
+from django.db.models import F
+
+DEFAULTS = {
+    # Put is_staff, is_active and the token version in issued JWTs, and
+    # authorize requests from those claims without loading the user
+    'ENABLED': False,
+    # Seconds a token version stays cached
+    'VERSION_TTL': 60,
+}
+
+VERSION_KEY = 'api:token-version:%s'
+
+# Version of users that no longer exist, which no token carries
+DELETED = -1
+
+class TokenRevoked(jwt.DecodeError):
+    """
+    Raised when decoding a token that has been revoked, on its own or by
+    bumping its version.
+
+    A `DecodeError` so that every caller of the decode handler, including the
+    refresh and verify serializers, already rejects it.
+    """
+
+def get_claims_option(name):
+    return getattr(settings, 'API_JWT_CLAIMS', {}).get(name, DEFAULTS[name])
+
+def get_token_version(pk):
+    """
+    Return the token version of user `pk`, `DELETED` if there is no such user.
+
+    Versions are cached in the default cache for `VERSION_TTL` seconds, so
+    checking a token mostly costs a cache read. Revoking writes the new
+    version into the cache, the expiry only bounds how long a version read
+    while a revocation was being committed can linger. Only users whose
+    tokens have been revoked have a row, every other user is at version 0.
+    """
+    from django.contrib.auth import get_user_model
+    from api.routers import use_primary
+
+    key = VERSION_KEY % pk
+    version = cache.get(key)
+    if version is None:
+        # A replica could still miss a new user or a revocation
+        with use_primary():
+            versions = list(get_user_model().objects.filter(pk=pk).values_list(
+                'token_version__version', flat=True))
+        version = (versions[0] or 0) if versions else DELETED
+        cache.add(key, version, get_claims_option('VERSION_TTL'))
+    return version
+
+def revoke_tokens(pk, deleted=False):
+    """
+    Invalidate every token issued to user `pk` so far, or for good once the
+    user has been `deleted`.
+    """
+    from api.models import TokenVersion
+
+    if deleted:
+        # The user's row went with it, no token carries this version
+        version = DELETED
+    else:
+        with transaction.atomic():
+            TokenVersion.objects.get_or_create(user_id=pk)
+            token_version = TokenVersion.objects.select_for_update().get(user_id=pk)
+            token_version.version += 1
+            token_version.save(update_fields=['version'])
+        version = token_version.version
+    # Setting the key rather than dropping it keeps a lookup that read the
+    # previous version meanwhile from caching it, cache.add() won't overwrite
+    cache.set(VERSION_KEY % pk, version, get_claims_option('VERSION_TTL'))
+
+def revoke_tokens_in_bulk(pks):
+    """
+    Invalidate every token issued so far to the users `pks`, with a handful
+    of queries per 500 users.
+    """
+    from api.models import TokenVersion
+
+    for start in range(0, len(pks), 500):
+        chunk = pks[start:start + 500]
+        try:
+            with transaction.atomic():
+                existing = set(TokenVersion.objects.filter(user_id__in=chunk).values_list('user_id', flat=True))
+                TokenVersion.objects.bulk_create([TokenVersion(user_id=pk) for pk in chunk if pk not in existing])
+                TokenVersion.objects.filter(user_id__in=chunk).update(version=F('version') + 1)
+                versions = TokenVersion.objects.filter(user_id__in=chunk).values_list('user_id', 'version')
+                versions = {VERSION_KEY % pk: version for pk, version in versions}
+        except IntegrityError:
+            # Another revocation created some of the rows meanwhile
+            for pk in chunk:
+                revoke_tokens(pk)
+        else:
+            cache.set_many(versions, get_claims_option('VERSION_TTL'))
@@ -8,7 +8,8 @@ router.register(r'users', views.UserViewSet, base_name='user')
 urlpatterns = [
     url(r'^v1/', include(router.urls, namespace='v1')),
     url(r'^drf/auth/', include('rest_framework.urls', namespace='rest_framework')),
-    url(r'^auth/login/$', 'rest_framework_jwt.views.obtain_jwt_token', name='obtain_jwt_token'),
+    url(r'^auth/login/$', 'api.views.obtain_jwt_token', name='obtain_jwt_token'),
     url(r'^auth/refresh/$', 'rest_framework_jwt.views.refresh_jwt_token', name='refresh_jwt_token'),
     url(r'^auth/verify/$', 'rest_framework_jwt.views.verify_jwt_token', name='verify_jwt_token'),
+    url(r'^auth/logout/$', 'api.views.logout_jwt_token', name='logout_jwt_token'),
 ]
@@ -0,0 +1,117 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+UserModel = get_user_model()
+
+DEFAULTS = {
+    'ENABLED': True,
+    # Seconds a resolved user may be served from the worker's memory
+    'TIMEOUT': 60,
+    # Upper bound on the number of users each worker keeps
+    'MAX_ENTRIES': 1024,
+}
+
+VERSION_KEY = 'api:user-version:%s'
+
+def get_user_version(pk):
+    """
+    Return the shared version of a user row.
+
+    The version lives in the default cache so that every worker sees a bump
+    made by any other worker. A missing key is seeded from the clock rather
+    than from zero, so it never matches a version handed out before the key
+    was lost.
+    """
+    key = VERSION_KEY % pk
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+def bump_user_version(pk):
+    key = VERSION_KEY % pk
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = int(time.time() * 1000)
+        cache.set(key, version, None)
+        return version
+
+def reset_user_versions(pks):
+    """
+    Invalidate the users `pks` in every worker with a single cache call,
+    their versions being seeded again from the clock on the next read.
+    """
+    cache.delete_many([VERSION_KEY % pk for pk in pks])
+
+class UserCache(object):
+    """
+    Bounded, per-process LRU cache of users resolved from JWT payloads.
+
+    Entries expire after `TIMEOUT` seconds and are dropped as soon as the
+    user's shared version moves on, which happens whenever the row is saved
+    or deleted in any worker.
+    """
+
+    def __init__(self, options=None):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.configure(options)
+
+    def configure(self, options=None):
+        if options is None:
+            options = getattr(settings, 'API_USER_CACHE', {})
+        config = dict(DEFAULTS, **options)
+        self.enabled = config['ENABLED']
+        self.timeout = config['TIMEOUT']
+        self.max_entries = config['MAX_ENTRIES']
+        self.clear()
+
+    def get(self, username):
+        with self._lock:
+            entry = self._entries.get(username)
+        if entry is None:
+            return None
+        pk, db, values, version, expires = entry
+        if expires < time.monotonic() or version != get_user_version(pk):
+            self.delete(username)
+            return None
+        with self._lock:
+            if username in self._entries:
+                self._entries.move_to_end(username)
+        # Hand out a fresh instance so requests never share mutable state
+        return UserModel.from_db(db, None, values)
+
+    def set(self, username, user, version):
+        """
+        Cache `user` under `version`, which must have been read before the
+        user was loaded so that a concurrent save can only make the entry
+        look older than it is, never newer.
+        """
+        values = tuple(getattr(user, field.attname) for field in UserModel._meta.concrete_fields)
+        entry = (user.pk, user._state.db, values, version,
+                 time.monotonic() + self.timeout)
+        with self._lock:
+            self._entries[username] = entry
+            self._entries.move_to_end(username)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, username):
+        with self._lock:
+            self._entries.pop(username, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+user_cache = UserCache()
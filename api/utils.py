@@ -1,4 +1,28 @@
+import uuid
+
+from rest_framework_jwt import utils
 from api.serializers.user import UserSerializer
+from api.revocation import revocation_list
+from api.tokens import TokenRevoked, get_claims_option, get_token_version
+
+def jwt_payload_handler(user):
+    payload = utils.jwt_payload_handler(user)
+    payload['jti'] = uuid.uuid4().hex
+    if get_claims_option('ENABLED'):
+        payload['is_staff'] = user.is_staff
+        payload['is_active'] = user.is_active
+        payload['ver'] = get_token_version(user.pk)
+    return payload
+
+def jwt_decode_handler(token):
+    payload = utils.jwt_decode_handler(token)
+    if revocation_list.enabled and revocation_list.is_revoked(payload.get('jti')):
+        raise TokenRevoked()
+    if get_claims_option('ENABLED'):
+        # Tokens issued before claims were enabled count as version 0
+        if payload.get('ver', 0) != get_token_version(payload.get('user_id')):
+            raise TokenRevoked()
+    return payload
 
 def jwt_response_payload_handler(token, user=None, request=None):
     return {
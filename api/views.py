@@ -1,7 +1,26 @@
 from rest_framework import viewsets, status
+from rest_framework.decorators import list_route, detail_route
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated, SAFE_METHODS
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_jwt.settings import api_settings
+from rest_framework_jwt.views import ObtainJSONWebToken
 from django.contrib.auth import get_user_model
-from api import permissions
-from api.serializers.user import UserSerializer, UserCreateSerializer
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
+from api import audit, permissions, tokens
+from api.conditional import representation_etag, etag_matches
+from api.export import stream_json, stream_msgpack
+from api.filters import UserFilterBackend
+from api.renderers import FastJSONRenderer, MessagePackRenderer, NDJSONRenderer
+from api.revocation import revoke_token
+from api.throttling import LoginIPThrottle, LoginUsernameThrottle, UserCreateThrottle
+from api.pagination import AuditCursorPagination, UserCursorPagination
+from api.context import get_auth_context, CURRENT_USER_PK
+from api.serializers.audit import AuditEventSerializer
+from api.serializers.mixins import select_fields
+from api.serializers.user import UserSerializer, UserCreateSerializer, UserBulkUpdateSerializer, USER_READ_FIELDS
 
 UserModel = get_user_model()
 
@@ -9,14 +28,51 @@ class UserViewSet(viewsets.ModelViewSet):
     model = UserModel
     queryset = UserModel.objects.all()
     permission_classes = (permissions.IsAdminOrSelfOrAnon,)
+    throttle_classes = (UserCreateThrottle,)
+    pagination_class = UserCursorPagination
+    filter_backends = (UserFilterBackend,)
     serializer_class = UserSerializer
     serializer_create_class = UserCreateSerializer
+    current_user_lookup = False
+    export_fields = USER_READ_FIELDS
 
-    def dispatch(self, request, *args, **kwargs):
-        req = self.initialize_request(request, *args, **kwargs)
-        if kwargs.get('pk') == 'current' and req.user.is_authenticated():
-            kwargs['pk'] = req.user.pk
-        return super(UserViewSet, self).dispatch(request, *args, **kwargs)
+    def perform_authentication(self, request):
+        # Resolve `current` against the request DRF has already authenticated,
+        # rather than building and authenticating a second request.
+        context = get_auth_context(request)
+        pk = self.kwargs.get('pk')
+        self.current_user_lookup = (pk == CURRENT_USER_PK and context.is_authenticated)
+        if self.current_user_lookup:
+            self.kwargs['pk'] = context.resolve_pk(pk)
+
+    def get_queryset(self):
+        queryset = super(UserViewSet, self).get_queryset()
+        if self.request.method in SAFE_METHODS and self.action in ('list', 'retrieve'):
+            # Only select the columns `?fields=` and `?exclude=` leave
+            columns = self.get_serializer().get_selected_columns()
+            if columns is not None:
+                queryset = queryset.only(*columns)
+        return queryset
+
+    def get_object(self):
+        if self.current_user_lookup:
+            # The authenticator has already loaded this row, or has the claims
+            # to load it without another lookup by pk
+            obj = get_auth_context(self.request).load_user()
+            self.check_object_permissions(self.request, obj)
+            return obj
+        return super(UserViewSet, self).get_object()
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        serializer = self.get_serializer(instance)
+        headers = {
+            'ETag': representation_etag(serializer.data, request.accepted_media_type),
+            'Cache-Control': 'private, no-cache',
+        }
+        if etag_matches(request, headers['ETag']):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(serializer.data, headers=headers)
 
     def get_serializer_class(self):
         assert self.serializer_class is not None, (
@@ -40,3 +96,103 @@ class UserViewSet(viewsets.ModelViewSet):
         else:
             return self.serializer_class
 
+    @list_route(renderer_classes=(FastJSONRenderer, NDJSONRenderer, MessagePackRenderer))
+    def export(self, request, *args, **kwargs):
+        """
+        Stream every user as a JSON array, as NDJSON with `?format=ndjson`, or
+        as a stream of MessagePack maps with `?format=msgpack`.
+        """
+        renderer = request.accepted_renderer
+        queryset = self.filter_queryset(self.get_queryset())
+        fields = select_fields(self.export_fields, request.query_params)
+        if fields is None:
+            fields = self.export_fields
+        if renderer.format == MessagePackRenderer.format:
+            content = stream_msgpack(queryset, fields)
+        else:
+            content = stream_json(queryset, fields, ndjson=renderer.format == NDJSONRenderer.format)
+        response = StreamingHttpResponse(content, content_type=renderer.media_type)
+        response['Content-Disposition'] = 'attachment; filename="users.%s"' % renderer.format
+        return response
+
+    @list_route(methods=['post'], url_path='bulk')
+    def bulk_create(self, request, *args, **kwargs):
+        """
+        Create a list of users at once, all of them or none.
+        """
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        users = serializer.save()
+        return Response(self.serializer_class(users, many=True).data, status=status.HTTP_201_CREATED)
+
+    @list_route(methods=['post'], url_path='bulk-update')
+    def bulk_update(self, request, *args, **kwargs):
+        """
+        Apply the same changes to many users at once, e.g. to activate them.
+        """
+        serializer = UserBulkUpdateSerializer(data=request.data, context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+        return Response({'updated': serializer.save()})
+
+    @detail_route(methods=['post'], url_path='revoke-tokens')
+    def revoke_tokens(self, request, *args, **kwargs):
+        """
+        Invalidate every token issued to the user so far.
+        """
+        user = self.get_object()
+        tokens.revoke_tokens(user.pk)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @detail_route(url_path='audit')
+    def audit(self, request, *args, **kwargs):
+        """
+        List the audit events of the user, newest first, optionally only the
+        `?action=` given and those from `?since=` until `?until=`.
+        """
+        user = self.get_object()
+        bounds = {}
+        for name in ('since', 'until'):
+            value = request.query_params.get(name)
+            if value:
+                bounds[name] = parse_datetime(value)
+                if bounds[name] is None:
+                    raise ValidationError({name: "Enter a valid date and time."})
+        events = audit.query_events(user_id=user.pk, actions=request.query_params.getlist('action'), **bounds)
+        paginator = AuditCursorPagination()
+        page = paginator.paginate_queryset(events, request, view=self)
+        return paginator.get_paginated_response(AuditEventSerializer(page, many=True).data)
+
+class ThrottledObtainJSONWebToken(ObtainJSONWebToken):
+    """
+    Login, rejecting attempts over the per-address or per-username budget
+    before the password is checked.
+    """
+    throttle_classes = (LoginIPThrottle, LoginUsernameThrottle)
+
+    def get_serializer(self, *args, **kwargs):
+        self.login_serializer = super(ThrottledObtainJSONWebToken, self).get_serializer(*args, **kwargs)
+        return self.login_serializer
+
+    def post(self, request, *args, **kwargs):
+        response = super(ThrottledObtainJSONWebToken, self).post(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            user = self.login_serializer.object['user']
+            audit.record(audit.LOGIN, user.pk, user.pk, request=request)
+        return response
+
+obtain_jwt_token = ThrottledObtainJSONWebToken.as_view()
+
+class LogoutView(APIView):
+    """
+    Revoke the token the request was authenticated with.
+    """
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request, *args, **kwargs):
+        payload = api_settings.JWT_DECODE_HANDLER(request.auth) if request.auth else {}
+        if 'jti' not in payload:
+            raise ValidationError({'token': "This token cannot be revoked."})
+        revoke_token(payload)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+logout_jwt_token = LogoutView.as_view()
@@ -0,0 +1,56 @@
+"""
+Benchmarks for the GovTracker API.
+
+Each module can be run on its own from the repository root, for example:
+
+    python -m benchmarks.serializers
+"""
+import os
+
+def setup():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "govtracker.settings")
+
+    import django
+    django.setup()
+
+def best_of(func, repeat):
+    """
+    Run `func` `repeat` times and return the fastest wall time in seconds.
+    """
+    import time
+
+    timings = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def percentile(timings, fraction):
+    """
+    Return the value below which `fraction` of the sorted `timings` fall.
+    """
+    timings = sorted(timings)
+    return timings[min(len(timings) - 1, int(len(timings) * fraction))]
+
+class test_database(object):
+    """
+    Context manager creating a throwaway database with every migration
+    applied, torn down again on exit.
+    """
+
+    def __enter__(self):
+        from django.db import connection
+        from django.test.utils import setup_test_environment
+
+        setup_test_environment()
+        self.connection = connection
+        self.old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0)
+        return connection
+
+    def __exit__(self, *exc_info):
+        from django.test.utils import teardown_test_environment
+
+        self.connection.creation.destroy_test_db(self.old_name, verbosity=0)
+        teardown_test_environment()
@@ -0,0 +1,276 @@
+"""
+Load-test the auth and users endpoints and write the results as JSON.
+
+    python -m benchmarks.endpoints [--requests 200] [--users 1000]
+                                   [--scenario list ...] [--output results.json]
+                                   [--compare previous.json]
+                                   [--url http://127.0.0.1:8000]
+
+Without `--url` the requests go through the WSGI handler in-process against
+a throwaway database seeded with `--users` users, and queries are counted
+with the connection's query log. With `--url` they are sent over one
+keep-alive connection to a running server (e.g. a local uwsgi). In that
+mode, the bench users are seeded into the configured database, which must
+be the one the server uses and have "test" or "bench" in its name. Queries are then read from the Server-Timing
+`sql` metric, and are only reported when the server samples every request
+(`GOVTRACKER_INSTRUMENTATION_SAMPLE_RATE=1`). Start that server with
+`GOVTRACKER_THROTTLE=False`, or logins and sign-ups are soon rejected.
+
+Requests are sent one at a time, so requests per second is the throughput of
+a single client rather than the capacity of the server.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import re
+import subprocess
+import time
+
+from benchmarks import setup, test_database, percentile
+
+ADMIN = ('bench-admin', 'bench-admin@example.com')
+USER = ('bench', 'bench@example.com')
+PASSWORDS = ('benchpassword', 'benchpassword2')
+
+SQL_METRIC = re.compile(r'(?:^|,\s*)sql;desc="(\d+)"')
+
+# Names of the databases seed() may write to, in-memory SQLite included
+DISPOSABLE_DATABASE = re.compile(r'test|bench|memory', re.IGNORECASE)
+
+class InProcessClient(object):
+    def __init__(self):
+        from django.db import connection
+        from django.test import Client
+
+        self.connection = connection
+        self.client = Client()
+
+    def request(self, method, path, data=None, token=None):
+        from django.test.utils import CaptureQueriesContext
+
+        extra = {'HTTP_AUTHORIZATION': 'Bearer ' + token} if token else {}
+        body = json.dumps(data) if data is not None else ''
+        with CaptureQueriesContext(self.connection) as queries:
+            response = self.client.generic(method, path, body, 'application/json', **extra)
+        return response.status_code, response.content, len(queries)
+
+class HTTPClient(object):
+    def __init__(self, url):
+        from http.client import HTTPConnection, HTTPSConnection
+        from urllib.parse import urlsplit
+
+        parts = urlsplit(url)
+        connection_class = HTTPSConnection if parts.scheme == 'https' else HTTPConnection
+        self.prefix = parts.path.rstrip('/')
+        self.connection = connection_class(parts.netloc)
+
+    def request(self, method, path, data=None, token=None):
+        headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
+        if token:
+            headers['Authorization'] = 'Bearer ' + token
+        body = json.dumps(data) if data is not None else None
+        self.connection.request(method, self.prefix + path, body, headers)
+        response = self.connection.getresponse()
+        content = response.read()
+        match = SQL_METRIC.search(response.getheader('Server-Timing') or '')
+        return response.status, content, int(match.group(1)) if match else None
+
+def seed(count):
+    """
+    Create the bench users plus `count` others, hashing one password for all.
+    """
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+
+    from django.db import connection
+
+    name = os.path.basename(str(connection.settings_dict['NAME']))
+    if not DISPOSABLE_DATABASE.search(name):
+        raise SystemExit('Refusing to seed %r, only a test or bench database will do' % name)
+
+    User = get_user_model()
+    usernames = ['bench-%d' % i for i in range(count)]
+    # Only the users a previous run created, real users may start with bench
+    stale = usernames + [ADMIN[0], USER[0]]
+    for start in range(0, len(stale), 500):
+        User.objects.filter(username__in=stale[start:start + 500]).delete()
+    password = make_password(PASSWORDS[0])
+    User.objects.bulk_create([
+        User(username=username, email=username + '@example.com', password=password)
+        for username in usernames
+    ], batch_size=500)
+    admin = User.objects.create_user(ADMIN[0], ADMIN[1], PASSWORDS[0])
+    admin.is_staff = True
+    admin.save()
+    User.objects.create_user(USER[0], USER[1], PASSWORDS[0])
+
+def obtain_token(client, username, password):
+    from django.core.urlresolvers import reverse
+
+    status, content, queries = client.request('POST', reverse('obtain_jwt_token'), {
+        'username': username,
+        'password': password,
+    })
+    assert status == 200, content
+    return json.loads(content.decode('utf-8'))['token']
+
+def build_scenarios(client):
+    """
+    Return `(name, expected status, request factory)` triples, each factory
+    taking the iteration number and returning `(method, path, data, token)`.
+    """
+    from django.core.urlresolvers import reverse
+
+    admin_token = obtain_token(client, ADMIN[0], PASSWORDS[0])
+    user_token = obtain_token(client, USER[0], PASSWORDS[0])
+    current = reverse('v1:user-detail', args=('current',))
+    run = int(time.time())
+
+    changes = [0]
+
+    def change_password(i):
+        # Alternate between two passwords so every request is a real change
+        old, new = PASSWORDS[changes[0] % 2], PASSWORDS[(changes[0] + 1) % 2]
+        changes[0] += 1
+        return 'PATCH', current, {
+            'current_password': old,
+            'new_password1': new,
+            'new_password2': new,
+        }, user_token
+
+    def create_user(i):
+        username = 'bench-new-%d-%d' % (run, i)
+        return 'POST', reverse('v1:user-list'), {
+            'username': username,
+            'email': username + '@example.com',
+            'new_password1': PASSWORDS[0],
+            'new_password2': PASSWORDS[0],
+        }, None
+
+    return [
+        ('obtain', 200, lambda i: ('POST', reverse('obtain_jwt_token'), {
+            'username': ADMIN[0],
+            'password': PASSWORDS[0],
+        }, None)),
+        ('refresh', 200, lambda i: ('POST', reverse('refresh_jwt_token'), {'token': user_token}, None)),
+        ('verify', 200, lambda i: ('POST', reverse('verify_jwt_token'), {'token': user_token}, None)),
+        ('list', 200, lambda i: ('GET', reverse('v1:user-list'), None, admin_token)),
+        ('current', 200, lambda i: ('GET', current, None, user_token)),
+        ('password', 200, change_password),
+        ('create', 201, create_user),
+    ]
+
+def run_scenario(client, expected, factory, requests, warmup):
+    for i in range(warmup):
+        client.request(*factory(requests + i))
+    timings = []
+    queries = []
+    errors = 0
+    started = time.perf_counter()
+    for i in range(requests):
+        method, path, data, token = factory(i)
+        start = time.perf_counter()
+        status, content, count = client.request(method, path, data, token)
+        timings.append(time.perf_counter() - start)
+        if status != expected:
+            errors += 1
+        if count is not None:
+            queries.append(count)
+    elapsed = time.perf_counter() - started
+    return {
+        'requests': requests,
+        'errors': errors,
+        'rps': round(requests / elapsed, 1),
+        'mean_ms': round(sum(timings) * 1000 / len(timings), 3),
+        'p50_ms': round(percentile(timings, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(timings, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(timings, 0.99) * 1000, 3),
+        'queries_per_request': round(sum(queries) / len(queries), 2) if queries else None,
+    }
+
+def describe_run(args):
+    import django
+    from django.db import connection
+
+    try:
+        revision = subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL
+        ).decode('ascii').strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    return {
+        'date': datetime.datetime.utcnow().isoformat() + 'Z',
+        'revision': revision,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'target': args.url or 'in-process',
+        'users': args.users,
+    }
+
+def print_results(results, previous=None):
+    print('%-10s %9s %9s %9s %9s %7s %8s' % ('scenario', 'p50 ms', 'p95 ms', 'p99 ms', 'req/s', 'q/req', 'errors'))
+    for name, result in results.items():
+        queries = result['queries_per_request']
+        print('%-10s %9.3f %9.3f %9.3f %9.1f %7s %8d' % (
+            name, result['p50_ms'], result['p95_ms'], result['p99_ms'], result['rps'],
+            '-' if queries is None else '%g' % queries, result['errors'],
+        ))
+        before = (previous or {}).get(name)
+        if before:
+            print('%-10s %+8.1f%% %+8.1f%% %+8.1f%% %+8.1f%%' % (
+                '', 100.0 * (result['p50_ms'] / before['p50_ms'] - 1),
+                100.0 * (result['p95_ms'] / before['p95_ms'] - 1),
+                100.0 * (result['p99_ms'] / before['p99_ms'] - 1),
+                100.0 * (result['rps'] / before['rps'] - 1),
+            ))
+
+def benchmark(client, args):
+    from collections import OrderedDict
+
+    seed(args.users)
+    results = OrderedDict()
+    for name, expected, factory in build_scenarios(client):
+        if args.scenario and name not in args.scenario:
+            continue
+        results[name] = run_scenario(client, expected, factory, args.requests, args.warmup)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200, help='measured requests per scenario')
+    parser.add_argument('--warmup', type=int, default=5, help='unmeasured requests per scenario')
+    parser.add_argument('--users', type=int, default=1000, help='users to seed')
+    parser.add_argument('--scenario', action='append', help='only run this scenario (repeatable)')
+    parser.add_argument('--url', help='benchmark a running server instead of the in-process app')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='print the change against a previous JSON file')
+    args = parser.parse_args()
+
+    setup()
+
+    from django.test.utils import override_settings
+
+    if args.url:
+        results = benchmark(HTTPClient(args.url), args)
+    else:
+        # Measure the code, not the instrumentation or the throttles
+        with test_database(), override_settings(API_INSTRUMENTATION={'ENABLED': False},
+                                                API_THROTTLE={'RATES': {}}):
+            results = benchmark(InProcessClient(), args)
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)['results']
+    print_results(results, previous)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'run': describe_run(args), 'results': results}, f, indent=2)
+            f.write('\n')
+
+if __name__ == '__main__':
+    main()
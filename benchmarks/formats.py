@@ -0,0 +1,58 @@
+"""
+Compare the sizes and encode/decode speeds of the API's response formats.
+
+    python -m benchmarks.formats [--users 1000] [--repeat 5]
+
+The payload is a page of the user list as `UserSerializer` renders it.
+`fast json` uses ujson when it is installed and is the stdlib otherwise.
+"""
+import argparse
+import gzip
+import json
+
+from benchmarks import setup, best_of
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup()
+
+    import msgpack
+    from django.contrib.auth import get_user_model
+    from rest_framework.renderers import JSONRenderer
+    from api.renderers import FastJSONRenderer, MessagePackRenderer, ujson
+    from api.serializers.user import UserSerializer
+
+    User = get_user_model()
+
+    users = [
+        User(pk=i, username='user%d' % i, email='user%d@example.com' % i,
+             first_name='First%d' % i, last_name='Last%d' % i)
+        for i in range(1, args.users + 1)
+    ]
+    data = {'next': None, 'previous': None, 'results': UserSerializer(users, many=True).data}
+
+    formats = [
+        ('json', JSONRenderer(), lambda content: json.loads(content.decode('utf-8'))),
+        ('fast json', FastJSONRenderer(), ujson.loads if ujson else
+            lambda content: json.loads(content.decode('utf-8'))),
+        ('msgpack', MessagePackRenderer(), lambda content: msgpack.unpackb(content, raw=False)),
+    ]
+    reference = json.loads(JSONRenderer().render(data).decode('utf-8'))
+
+    print('%d users, best of %d%s' % (args.users, args.repeat, '' if ujson else ', ujson not installed'))
+    print('%-10s %10s %10s %10s %10s' % ('format', 'bytes', 'gzipped', 'encode ms', 'decode ms'))
+    for name, renderer, decode in formats:
+        content = renderer.render(data)
+        assert decode(content) == reference, '%s does not round-trip the JSON data' % name
+        encode_seconds = best_of(lambda: renderer.render(data), args.repeat)
+        decode_seconds = best_of(lambda: decode(content), args.repeat)
+        print('%-10s %10d %10d %10.2f %10.2f' % (
+            name, len(content), len(gzip.compress(content)), encode_seconds * 1000, decode_seconds * 1000
+        ))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Measure login throughput of obtain_jwt_token for several hasher settings.
+
+    python -m benchmarks.login [--logins 50] [--config pbkdf2:20000 ...]
+
+A config is `<hasher>:<cost>`, where the cost is the PBKDF2 iteration count
+or the bcrypt rounds. Every login after the first also exercises the
+re-hash check, since the stored hash already uses the configured cost.
+"""
+import argparse
+import time
+
+from benchmarks import setup, test_database
+
+DEFAULT_CONFIGS = ['pbkdf2:20000', 'pbkdf2:10000', 'pbkdf2:5000']
+
+def hashing_settings(config):
+    from django.conf import settings
+
+    hasher, cost = config.split(':')
+    options = {
+        'HASHER': hasher,
+        'PBKDF2_ITERATIONS': int(cost),
+        'BCRYPT_ROUNDS': int(cost),
+    }
+    hashers = (settings.PASSWORD_HASHER_CHOICES[hasher],) + tuple(
+        path for name, path in sorted(settings.PASSWORD_HASHER_CHOICES.items()) if name != hasher
+    )
+    return {'API_PASSWORD_HASHING': options, 'PASSWORD_HASHERS': hashers}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--logins', type=int, default=50)
+    parser.add_argument('--config', action='append')
+    args = parser.parse_args()
+
+    setup()
+
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.core.urlresolvers import reverse
+    from django.test.utils import override_settings
+    from rest_framework.test import APIClient
+
+    User = get_user_model()
+
+    # Measure the hashing, not the instrumentation or the throttles
+    with test_database(), override_settings(API_INSTRUMENTATION={'ENABLED': False},
+                                            API_THROTTLE={'RATES': {}}):
+        url = reverse('obtain_jwt_token')
+        client = APIClient()
+        print('%d logins per config' % args.logins)
+        for config in args.config or DEFAULT_CONFIGS:
+            if config.split(':')[0] not in settings.PASSWORD_HASHER_CHOICES:
+                print('%-16s skipped, not one of %s' % (config, ', '.join(sorted(settings.PASSWORD_HASHER_CHOICES))))
+                continue
+            with override_settings(**hashing_settings(config)):
+                User.objects.filter(username='bench').delete()
+                User.objects.create_user('bench', 'bench@example.com', 'benchpassword')
+                data = {'username': 'bench', 'password': 'benchpassword'}
+                start = time.perf_counter()
+                for i in range(args.logins):
+                    response = client.post(url, data, format='json')
+                    assert response.status_code == 200, response.content
+                seconds = time.perf_counter() - start
+            print('%-16s %8.1f logins/s %8.2f ms/login' % (config, args.logins / seconds, seconds * 1000 / args.logins))
+
+if __name__ == '__main__':
+    main()
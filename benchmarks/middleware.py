@@ -0,0 +1,56 @@
+"""
+Compare request latency through the full middleware stack and API mode.
+
+    python -m benchmarks.middleware [--requests 500]
+"""
+import argparse
+import time
+
+from benchmarks import setup, test_database, percentile
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+
+    setup()
+
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.core.urlresolvers import reverse
+    from django.test.utils import override_settings
+    from rest_framework.test import APIClient
+
+    User = get_user_model()
+
+    # Measure the middleware, not the instrumentation
+    with test_database(), override_settings(API_INSTRUMENTATION={'ENABLED': False}):
+        User.objects.create_user('bench', 'bench@example.com', 'benchpassword')
+        token = APIClient().post(reverse('obtain_jwt_token'), {
+            'username': 'bench',
+            'password': 'benchpassword'
+        }, format='json').data['token']
+        url = reverse('v1:user-detail', args=('current',))
+
+        print('GET %s, %d requests' % (url, args.requests))
+        for name, middleware in (('full stack', settings.FULL_MIDDLEWARE_CLASSES),
+                                 ('API mode', settings.API_MODE_MIDDLEWARE_CLASSES)):
+            with override_settings(MIDDLEWARE_CLASSES=middleware):
+                client = APIClient()
+                client.credentials(HTTP_AUTHORIZATION='Bearer ' + token)
+                client.get(url)
+                timings = []
+                for i in range(args.requests):
+                    start = time.perf_counter()
+                    response = client.get(url)
+                    timings.append(time.perf_counter() - start)
+                    assert response.status_code == 200, response.content
+            print('%-12s mean %6.3f ms  p50 %6.3f ms  p95 %6.3f ms' % (
+                name,
+                sum(timings) * 1000 / len(timings),
+                percentile(timings, 0.50) * 1000,
+                percentile(timings, 0.95) * 1000,
+            ))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Compare the fast representation path of UserSerializer with DRF's own.
+
+    python -m benchmarks.serializers [--users 10000] [--repeat 5]
+"""
+import argparse
+
+from benchmarks import setup, best_of
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup()
+
+    from django.contrib.auth import get_user_model
+    from rest_framework.renderers import JSONRenderer
+    from rest_framework.serializers import ModelSerializer
+    from api.serializers.user import UserSerializer
+
+    User = get_user_model()
+
+    class ReferenceUserSerializer(UserSerializer):
+        def to_representation(self, instance):
+            return ModelSerializer.to_representation(self, instance)
+
+    users = [
+        User(pk=i, username='user%d' % i, email='user%d@example.com' % i,
+             first_name='First%d' % i, last_name='Last%d' % i)
+        for i in range(1, args.users + 1)
+    ]
+    renderer = JSONRenderer()
+
+    reference = renderer.render(ReferenceUserSerializer(users, many=True).data)
+    fast = renderer.render(UserSerializer(users, many=True).data)
+    assert fast == reference, 'fast representation differs from the reference serializer'
+
+    results = [
+        ('list, DRF fields', lambda: ReferenceUserSerializer(users, many=True).data),
+        ('list, fast plan', lambda: UserSerializer(users, many=True).data),
+        ('detail x N, DRF fields', lambda: [ReferenceUserSerializer(user).data for user in users]),
+        ('detail x N, fast plan', lambda: [UserSerializer(user).data for user in users]),
+    ]
+    print('%d users, best of %d' % (args.users, args.repeat))
+    for name, func in results:
+        seconds = best_of(func, args.repeat)
+        print('%-24s %8.1f ms %8.2f us/user' % (name, seconds * 1000, seconds * 1e6 / args.users))
+
+if __name__ == '__main__':
+    main()
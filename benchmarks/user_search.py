@@ -0,0 +1,109 @@
+"""
+Time the user list filters on a large seeded table and show their plans.
+
+    python -m benchmarks.user_search [--users 1000000] [--repeat 5] [--without-indexes]
+
+Each filter runs as the paginated list query would, ordered by id and
+limited to one page. With `--without-indexes` every query is timed again
+after dropping the indexes of the `0004_user_search_indexes` migration.
+"""
+import argparse
+import datetime
+import importlib
+import random
+
+from benchmarks import setup, test_database, best_of
+
+QUERIES = [
+    'username=ma',
+    'username=marko',
+    'email_domain=d042.example.com',
+    'is_active=false',
+    'joined_after=2015-03-01&joined_before=2015-03-02',
+    'is_active=false&joined_after=2015-03-01&joined_before=2015-04-01',
+    'search=ark12',
+]
+
+SYLLABLES = ['ma', 'ri', 'ko', 'la', 'ne', 'to', 'sa', 'pe', 'di', 'vu', 'jo', 'an']
+
+def seed(connection, count):
+    from django.contrib.auth import get_user_model
+    from django.utils import timezone
+
+    table = connection.ops.quote_name(get_user_model()._meta.db_table)
+    start = timezone.make_aware(datetime.datetime(2014, 1, 1))
+    rng = random.Random(0)
+
+    def rows(offset, size):
+        for i in range(offset, offset + size):
+            name = ''.join(rng.choice(SYLLABLES) for j in range(3))
+            yield (
+                '!', False, '%s%d' % (name, i), name.title(), '',
+                '%s%d@d%03d.example.com' % (name, i, rng.randrange(1000)),
+                False, rng.random() > 0.05, start + datetime.timedelta(seconds=rng.randrange(3 * 365 * 86400)),
+            )
+
+    sql = ('INSERT INTO %s (password, is_superuser, username, first_name, last_name, email, '
+           'is_staff, is_active, date_joined) VALUES (%%s, %%s, %%s, %%s, %%s, %%s, %%s, %%s, %%s)' % table)
+    batch = 10000
+    with connection.cursor() as cursor:
+        for offset in range(0, count, batch):
+            cursor.executemany(sql, list(rows(offset, min(batch, count - offset))))
+        cursor.execute('ANALYZE')
+
+def explain(connection, queryset):
+    sql, params = queryset.query.sql_with_params()
+    prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+    with connection.cursor() as cursor:
+        cursor.execute(prefix + sql, params)
+        return [row[-1] for row in cursor.fetchall()]
+
+def run(connection, queries, repeat):
+    from django.contrib.auth import get_user_model
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+    from api.filters import UserFilterBackend
+
+    User = get_user_model()
+    backend = UserFilterBackend()
+    timings = {}
+    for query in queries:
+        request = Request(APIRequestFactory().get('/?' + query))
+        queryset = backend.filter_queryset(request, User.objects.order_by('id'), None)[:101]
+        seconds = best_of(lambda: list(queryset.all()), repeat)
+        timings[query] = seconds
+        print('%-64s %9.3f ms' % (query, seconds * 1000))
+        for line in explain(connection, queryset):
+            print('    %s' % line)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--without-indexes', action='store_true')
+    args = parser.parse_args()
+
+    setup()
+
+    with test_database() as connection:
+        print('Seeding %d users on %s' % (args.users, connection.vendor))
+        seed(connection, args.users)
+
+        print('\nWith indexes')
+        indexed = run(connection, QUERIES, args.repeat)
+
+        if args.without_indexes:
+            migration = importlib.import_module('api.migrations.0004_user_search_indexes')
+            with connection.cursor() as cursor:
+                for name, definition in migration.INDEXES.get(connection.vendor, []):
+                    cursor.execute('DROP INDEX %s' % connection.ops.quote_name(name))
+                cursor.execute('ANALYZE')
+            print('\nWithout indexes')
+            plain = run(connection, QUERIES, args.repeat)
+            print('\nSpeedup')
+            for query in QUERIES:
+                print('%-64s %8.1fx' % (query, plain[query] / indexed[query]))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+Compare forked workers with and without the pre-fork warm-up.
+
+    python -m benchmarks.warmup [--workers 4]
+
+Mimics uwsgi: a master process imports `govtracker.wsgi`, with
+GOVTRACKER_WARMUP on or off, then forks workers one at a time. Each worker
+serves two authenticated requests and reports how long they took, and its
+resident and private (not shared with the master) memory after them.
+"""
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks import setup, test_database
+
+def memory_usage():
+    """
+    Return the resident and private memory of this process in MiB.
+    """
+    path = '/proc/self/smaps_rollup'
+    if not os.path.exists(path):
+        path = '/proc/self/smaps'
+    rss = private = 0
+    with open(path) as smaps:
+        for line in smaps:
+            if line.startswith('Rss:'):
+                rss += int(line.split()[1])
+            elif line.startswith(('Private_Clean:', 'Private_Dirty:')):
+                private += int(line.split()[1])
+    return rss / 1024.0, private / 1024.0
+
+def request(application, token):
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': '/api/v1/users/current/',
+        'QUERY_STRING': '',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': '127.0.0.1',
+        'HTTP_AUTHORIZATION': 'Bearer ' + token,
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': False,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    status = []
+    start = time.perf_counter()
+    body = b''.join(application(environ, lambda code, headers, exc_info=None: status.append(code)))
+    seconds = time.perf_counter() - start
+    assert status[0].startswith('200'), body
+    return seconds
+
+def run_master(args):
+    """
+    Load the application as the uwsgi master would, then fork the workers.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'govtracker.settings')
+    from django.conf import settings
+    settings.DATABASES['default']['NAME'] = args.database
+
+    from govtracker.wsgi import application
+
+    print(json.dumps({'master_rss': memory_usage()[0]}))
+    for i in range(args.workers):
+        sys.stdout.flush()
+        pid = os.fork()
+        if pid == 0:
+            first = request(application, args.token)
+            second = request(application, args.token)
+            rss, private = memory_usage()
+            print(json.dumps({'first': first, 'second': second, 'rss': rss, 'private': private}))
+            sys.stdout.flush()
+            os._exit(0)
+        os.waitpid(pid, 0)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--master', help=argparse.SUPPRESS)
+    parser.add_argument('--database', help=argparse.SUPPRESS)
+    parser.add_argument('--token', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.master:
+        return run_master(args)
+
+    setup()
+
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from rest_framework_jwt.settings import api_settings
+
+    if connection.vendor == 'sqlite':
+        # The workers run in other processes, so the test database must be a file
+        directory = tempfile.mkdtemp()
+        connection.settings_dict['TEST'] = {'NAME': os.path.join(directory, 'warmup.sqlite3')}
+
+    with test_database() as connection:
+        user = get_user_model().objects.create_user('bench', 'bench@example.com', 'benchpassword')
+        token = api_settings.JWT_ENCODE_HANDLER(api_settings.JWT_PAYLOAD_HANDLER(user))
+        connection.close()
+
+        print('%d workers, GET /api/v1/users/current/' % args.workers)
+        print('%-8s %10s %10s %10s %12s %12s' % ('', 'first ms', 'second ms', 'RSS MiB', 'private MiB', 'master MiB'))
+        for mode in ('cold', 'warm'):
+            env = dict(os.environ, GOVTRACKER_WARMUP=str(mode == 'warm'), GOVTRACKER_INSTRUMENTATION_SAMPLE_RATE='0')
+            output = subprocess.check_output([
+                sys.executable, '-m', 'benchmarks.warmup', '--master', mode,
+                '--workers', str(args.workers), '--database', connection.settings_dict['NAME'], '--token', token,
+            ], env=env)
+            lines = [json.loads(line) for line in output.decode('utf-8').splitlines() if line.startswith('{')]
+            master_rss = lines[0]['master_rss']
+            workers = lines[1:]
+            print('%-8s %10.2f %10.2f %10.1f %12.1f %12.1f' % (
+                mode,
+                sum(worker['first'] for worker in workers) * 1000 / len(workers),
+                sum(worker['second'] for worker in workers) * 1000 / len(workers),
+                sum(worker['rss'] for worker in workers) / len(workers),
+                sum(worker['private'] for worker in workers) / len(workers),
+                master_rss,
+            ))
+
+if __name__ == '__main__':
+    main()
@@ -12,12 +12,17 @@ https://docs.djangoproject.com/en/1.8/ref/settings/
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 import os
+import sys
 import json
 
+from django.core.exceptions import ImproperlyConfigured
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 GOVTRACKER_PROD = True if os.environ.get('GOVTRACKER_PROD', False) == 'True' else False
 
+TESTING = sys.argv[1:2] == ['test']
+
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/1.8/howto/deployment/checklist/
 
@@ -29,6 +34,12 @@ SECRET_KEY = '5bb^s!+fv94j+z-1a(9s!l$sk9l7ie5zh1i=+pn&e+&c7pmo%&' if not GOVTRAC
 
 ALLOWED_HOSTS = [] if not GOVTRACKER_PROD else json.loads(os.environ.get('GOVTRACKER_ALLOWED_HOSTS'))
 
+# Told about new accounts to activate, a JSON list of [name, email] pairs
+ADMINS = [tuple(admin) for admin in json.loads(os.environ.get('GOVTRACKER_ADMINS', '[]'))]
+
+if not GOVTRACKER_PROD:
+    EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+
 
 # Application definition
 
@@ -51,7 +62,32 @@ LOCAL_APPS = (
 
 INSTALLED_APPS = LOCAL_APPS + THIRD_PARTY_APPS + DEFAULT_APPS
 
-MIDDLEWARE_CLASSES = (
+# In API mode requests under API_MODE_PATH skip the session, CSRF, auth and
+# messages middleware, which the JWT-only API never uses. The paths in
+# API_MODE_FULL_STACK_PATHS still get the full stack.
+API_MODE = os.environ.get('GOVTRACKER_API_MODE', str(GOVTRACKER_PROD)) == 'True'
+API_MODE_PATH = '/api/'
+API_MODE_FULL_STACK_PATHS = ('/admin/', '/api/drf/auth/')
+
+API_MODE_MIDDLEWARE_CLASSES = (
+    'api.middleware.ServerTimingMiddleware',
+    'api.middleware.CompressionMiddleware',
+    'api.middleware.ReplicaRoutingMiddleware',
+    'api.middleware.APIModeMiddleware',
+    'api.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'api.middleware.CsrfViewMiddleware',
+    'api.middleware.AuthenticationMiddleware',
+    'api.middleware.SessionAuthenticationMiddleware',
+    'api.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+)
+
+FULL_MIDDLEWARE_CLASSES = (
+    'api.middleware.ServerTimingMiddleware',
+    'api.middleware.CompressionMiddleware',
+    'api.middleware.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -62,6 +98,8 @@ MIDDLEWARE_CLASSES = (
     'django.middleware.security.SecurityMiddleware',
 )
 
+MIDDLEWARE_CLASSES = API_MODE_MIDDLEWARE_CLASSES if API_MODE else FULL_MIDDLEWARE_CLASSES
+
 ROOT_URLCONF = 'govtracker.urls'
 
 TEMPLATES = [
@@ -92,16 +130,44 @@ if GOVTRACKER_PROD:
     # Expected format: postgresql://<username>:<password>@<private_ip>:<port>/<dbname>
     POSTGRESQL_URL = urlparse(os.environ.get('GOVTRACKER_POSTGRESQL_URL'))
 
+    # Connections of the per-worker pool kept for requests, 0 disables
+    # pooling. Each thread holds its own connection, so this must be at least
+    # the threads serving requests in a worker, 1 unless uwsgi runs with
+    # --threads. The pool gets one more for the audit log's flush thread.
+    POSTGRESQL_POOL_SIZE = int(os.environ.get('GOVTRACKER_POSTGRESQL_POOL_SIZE', 0))
+
     DATABASES = {
         'default': {
-            'ENGINE': 'django.db.backends.postgresql_psycopg2',
+            'ENGINE': 'api.db.backends.postgresql',
             'NAME': POSTGRESQL_URL.path.strip('/'),
             'USER': POSTGRESQL_URL.username,
             'PASSWORD': POSTGRESQL_URL.password,
             'HOST': POSTGRESQL_URL.hostname,
             'PORT': POSTGRESQL_URL.port,
+            # Keep each worker's connection open between requests, unless the
+            # pool is taking care of reuse
+            'CONN_MAX_AGE': 0 if POSTGRESQL_POOL_SIZE else int(os.environ.get('GOVTRACKER_CONN_MAX_AGE', 600)),
+            # Replace connections left dead by a failover before using them
+            'CONN_HEALTH_CHECKS': True,
+            'POOL': {
+                'MIN_SIZE': min(1, POSTGRESQL_POOL_SIZE),
+                'MAX_SIZE': POSTGRESQL_POOL_SIZE + 1 if POSTGRESQL_POOL_SIZE else 0,
+            },
         }
     }
+
+    # Optional streaming replica, same format as GOVTRACKER_POSTGRESQL_URL
+    if os.environ.get('GOVTRACKER_POSTGRESQL_REPLICA_URL'):
+        POSTGRESQL_REPLICA_URL = urlparse(os.environ['GOVTRACKER_POSTGRESQL_REPLICA_URL'])
+        DATABASES['replica'] = dict(
+            DATABASES['default'],
+            NAME=POSTGRESQL_REPLICA_URL.path.strip('/'),
+            USER=POSTGRESQL_REPLICA_URL.username,
+            PASSWORD=POSTGRESQL_REPLICA_URL.password,
+            HOST=POSTGRESQL_REPLICA_URL.hostname,
+            PORT=POSTGRESQL_REPLICA_URL.port,
+            TEST={'MIRROR': 'default'},
+        )
 else:
     DATABASES = {
         'default': {
@@ -110,6 +176,102 @@ else:
         }
     }
 
+    # Optional second SQLite file standing in for a replica, e.g. a copy of
+    # db.sqlite3, to try the routing locally
+    if os.environ.get('GOVTRACKER_SQLITE_REPLICA'):
+        DATABASES['replica'] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ['GOVTRACKER_SQLITE_REPLICA'],
+            'TEST': {'MIRROR': 'default'},
+        }
+
+# Reads go to the replicas, writes and anything read after them to default
+DATABASE_ROUTERS = ['api.routers.PrimaryReplicaRouter']
+
+# Not in tests: Django 1.8 gives each test mirror its own connection, which
+# cannot see the rows of the test case's open transaction
+API_DATABASE_ROUTING = {
+    'REPLICAS': () if TESTING else tuple(alias for alias in DATABASES if alias != 'default'),
+    'PIN_SECONDS': int(os.environ.get('GOVTRACKER_REPLICA_PIN_SECONDS', 5)),
+}
+
+
+# Caches
+# https://docs.djangoproject.com/en/1.8/topics/cache/
+
+# Caches that only one process sees, or that cull at random and list every
+# entry on each write, can't hold what workers share
+UNSHARED_CACHE_BACKENDS = (
+    'django.core.cache.backends.dummy.DummyCache',
+    'django.core.cache.backends.filebased.FileBasedCache',
+    'django.core.cache.backends.locmem.LocMemCache',
+)
+
+if GOVTRACKER_PROD:
+    # Shared by all uwsgi workers, and by every host when
+    # GOVTRACKER_CACHE_LOCATION lists the same memcached servers. The image
+    # runs a memcached on 127.0.0.1 for a single host.
+    CACHES = {
+        'default': {
+            'BACKEND': os.environ.get('GOVTRACKER_CACHE_BACKEND', 'django.core.cache.backends.memcached.MemcachedCache'),
+            'LOCATION': os.environ.get('GOVTRACKER_CACHE_LOCATION', '127.0.0.1:11211').split(','),
+        },
+        # Rate limit counters, which need an atomic incr
+        'throttle': {
+            'BACKEND': os.environ.get('GOVTRACKER_THROTTLE_CACHE_BACKEND', 'django.core.cache.backends.memcached.MemcachedCache'),
+            'LOCATION': os.environ.get('GOVTRACKER_THROTTLE_CACHE_LOCATION',
+                                       os.environ.get('GOVTRACKER_CACHE_LOCATION', '127.0.0.1:11211')).split(','),
+            'KEY_PREFIX': 'throttle',
+        },
+    }
+    if CACHES['default']['BACKEND'] in UNSHARED_CACHE_BACKENDS:
+        raise ImproperlyConfigured("GOVTRACKER_CACHE_BACKEND must be a shared cache such as memcached in production.")
+    if CACHES['throttle']['BACKEND'] in UNSHARED_CACHE_BACKENDS:
+        raise ImproperlyConfigured("GOVTRACKER_THROTTLE_CACHE_BACKEND must be a cache with an atomic incr, "
+                                   "such as memcached, in production.")
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        'throttle': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'throttle',
+        },
+    }
+
+
+# Password hashing
+# https://docs.djangoproject.com/en/1.8/topics/auth/passwords/
+
+API_PASSWORD_HASHING = {
+    # One of PASSWORD_HASHER_CHOICES, md5 is only meant for the test suite
+    'HASHER': os.environ.get('GOVTRACKER_PASSWORD_HASHER', 'md5' if TESTING else 'pbkdf2'),
+    'PBKDF2_ITERATIONS': int(os.environ.get('GOVTRACKER_PBKDF2_ITERATIONS', 20000)),
+    'BCRYPT_ROUNDS': int(os.environ.get('GOVTRACKER_BCRYPT_ROUNDS', 12)),
+}
+
+PASSWORD_HASHER_CHOICES = {
+    'pbkdf2': 'api.hashers.TunablePBKDF2PasswordHasher',
+    'bcrypt': 'api.hashers.TunableBCryptSHA256PasswordHasher',
+}
+
+# Unsalted MD5 only keeps the test suite fast, anywhere else it would let
+# any MD5 hash that reaches the table authenticate
+if TESTING:
+    PASSWORD_HASHER_CHOICES['md5'] = 'django.contrib.auth.hashers.MD5PasswordHasher'
+
+if API_PASSWORD_HASHING['HASHER'] not in PASSWORD_HASHER_CHOICES:
+    raise ImproperlyConfigured("GOVTRACKER_PASSWORD_HASHER must be one of %s." % ', '.join(
+        sorted(PASSWORD_HASHER_CHOICES)))
+
+# The chosen hasher makes new hashes, the others still verify existing ones,
+# which are re-hashed with the chosen hasher on the next successful login.
+PASSWORD_HASHERS = (PASSWORD_HASHER_CHOICES[API_PASSWORD_HASHING['HASHER']],) + tuple(
+    hasher for name, hasher in sorted(PASSWORD_HASHER_CHOICES.items())
+    if name != API_PASSWORD_HASHING['HASHER']
+)
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/1.8/topics/i18n/
@@ -138,9 +300,22 @@ if GOVTRACKER_PROD:
             'rest_framework.permissions.DjangoModelPermissionsOrAnonReadOnly',
         ),
         'DEFAULT_AUTHENTICATION_CLASSES': (
-            'rest_framework_jwt.authentication.JSONWebTokenAuthentication',
+            'api.authentication.CachedJSONWebTokenAuthentication',
         ),
         'DEFAULT_VERSIONING_CLASS': 'rest_framework.versioning.NamespaceVersioning',
+        'DEFAULT_RENDERER_CLASSES': (
+            'api.renderers.FastJSONRenderer',
+            'api.renderers.MessagePackRenderer',
+            'rest_framework.renderers.BrowsableAPIRenderer',
+        ),
+        'DEFAULT_PARSER_CLASSES': (
+            'api.parsers.FastJSONParser',
+            'api.parsers.MessagePackParser',
+            'rest_framework.parsers.FormParser',
+            'rest_framework.parsers.MultiPartParser',
+        ),
+        # Proxies in front of uwsgi that append to X-Forwarded-For
+        'NUM_PROXIES': int(os.environ.get('GOVTRACKER_NUM_PROXIES', 0)),
     }
 else:
     REST_FRAMEWORK = {
@@ -148,15 +323,149 @@ else:
             'rest_framework.permissions.AllowAny',
         ),
         'DEFAULT_AUTHENTICATION_CLASSES': (
-            'rest_framework_jwt.authentication.JSONWebTokenAuthentication',
+            'api.authentication.CachedJSONWebTokenAuthentication',
             'rest_framework.authentication.SessionAuthentication',
         ),
         'DEFAULT_VERSIONING_CLASS': 'rest_framework.versioning.NamespaceVersioning',
+        'DEFAULT_RENDERER_CLASSES': (
+            'api.renderers.FastJSONRenderer',
+            'api.renderers.MessagePackRenderer',
+            'rest_framework.renderers.BrowsableAPIRenderer',
+        ),
+        'DEFAULT_PARSER_CLASSES': (
+            'api.parsers.FastJSONParser',
+            'api.parsers.MessagePackParser',
+            'rest_framework.parsers.FormParser',
+            'rest_framework.parsers.MultiPartParser',
+        ),
+        # Proxies in front of uwsgi that append to X-Forwarded-For
+        'NUM_PROXIES': int(os.environ.get('GOVTRACKER_NUM_PROXIES', 0)),
     }
 
 # Django REST Framework JWT options
 JWT_AUTH = {
+    'JWT_PAYLOAD_HANDLER': 'api.utils.jwt_payload_handler',
+    'JWT_DECODE_HANDLER': 'api.utils.jwt_decode_handler',
     'JWT_RESPONSE_PAYLOAD_HANDLER': 'api.utils.jwt_response_payload_handler',
     'JWT_AUTH_HEADER_PREFIX': 'Bearer',
     'JWT_ALLOW_REFRESH': True,
 }
+
+# Authorize requests from is_staff, is_active and token version claims in the
+# JWT, loading the user only when a view needs the full row
+API_JWT_CLAIMS = {
+    'ENABLED': os.environ.get('GOVTRACKER_JWT_CLAIMS', 'True') == 'True',
+    'VERSION_TTL': int(os.environ.get('GOVTRACKER_TOKEN_VERSION_TTL', 60)),
+}
+
+# Revocation of single tokens on logout. Each worker polls for tokens revoked
+# elsewhere every REFRESH_INTERVAL seconds
+API_TOKEN_REVOCATION = {
+    'ENABLED': True,
+    'REFRESH_INTERVAL': int(os.environ.get('GOVTRACKER_REVOCATION_REFRESH_INTERVAL', 5)),
+}
+
+# Budgets for the endpoints that hash passwords. Requests over budget are
+# rejected before any hashing or database work. Off in tests, and with
+# GOVTRACKER_THROTTLE=False, e.g. for load tests. Counted in the throttle
+# cache, see CACHES
+API_THROTTLE = {
+    'CACHE': 'throttle',
+    'RATES': {
+        'login_ip': os.environ.get('GOVTRACKER_THROTTLE_LOGIN_IP', '30/min'),
+        'login_username': os.environ.get('GOVTRACKER_THROTTLE_LOGIN_USERNAME', '10/min'),
+        'user_create': os.environ.get('GOVTRACKER_THROTTLE_USER_CREATE', '20/hour'),
+    } if os.environ.get('GOVTRACKER_THROTTLE', str(not TESTING)) == 'True' else {},
+}
+
+# Per-worker cache of users resolved from JWTs
+API_USER_CACHE = {
+    'ENABLED': True,
+    'TIMEOUT': int(os.environ.get('GOVTRACKER_USER_CACHE_TIMEOUT', 60)),
+    'MAX_ENTRIES': int(os.environ.get('GOVTRACKER_USER_CACHE_MAX_ENTRIES', 1024)),
+}
+
+# Cursor pagination of the user list
+API_USER_PAGINATION = {
+    'PAGE_SIZE': int(os.environ.get('GOVTRACKER_USER_PAGE_SIZE', 100)),
+    'MAX_PAGE_SIZE': 1000,
+}
+
+# Bulk user creation
+API_BULK_CREATE = {
+    'MAX_USERS': 1000,
+    'HASH_WORKERS': int(os.environ.get('GOVTRACKER_BULK_CREATE_HASH_WORKERS', 4)),
+    'BATCH_SIZE': 500,
+}
+
+# Background jobs, run by `manage.py run_jobs`
+API_JOBS = {
+    'BATCH_SIZE': int(os.environ.get('GOVTRACKER_JOBS_BATCH_SIZE', 10)),
+    'MAX_ATTEMPTS': int(os.environ.get('GOVTRACKER_JOBS_MAX_ATTEMPTS', 5)),
+}
+
+# Bulk user updates
+API_BULK_UPDATE = {
+    'MAX_IDS': 500,
+    'MAX_USERS': int(os.environ.get('GOVTRACKER_BULK_UPDATE_MAX_USERS', 1000)),
+}
+
+# Audit trail of account changes and logins, buffered in each worker and
+# written in batches
+API_AUDIT = {
+    # Enabled by the tests that need it, which flush explicitly
+    'ENABLED': not TESTING,
+    'BATCH_SIZE': int(os.environ.get('GOVTRACKER_AUDIT_BATCH_SIZE', 100)),
+    'FLUSH_INTERVAL': int(os.environ.get('GOVTRACKER_AUDIT_FLUSH_INTERVAL', 5)),
+    'FLUSH_THREAD': True,
+}
+
+# Per-request instrumentation, logged to api.performance and, outside of
+# production, reported in a Server-Timing header
+API_INSTRUMENTATION = {
+    'ENABLED': True,
+    'SAMPLE_RATE': float(os.environ.get('GOVTRACKER_INSTRUMENTATION_SAMPLE_RATE', 0.01 if GOVTRACKER_PROD else 1)),
+    # Timings tell how long lookups take, keep them out of public responses
+    'HEADER': os.environ.get('GOVTRACKER_INSTRUMENTATION_HEADER', str(not GOVTRACKER_PROD)) == 'True',
+    'LOG': True,
+}
+
+# Compression of responses of at least MIN_SIZE bytes. The auth endpoints
+# are excluded as they echo tokens back next to client input (BREACH)
+API_COMPRESSION = {
+    'ENABLED': os.environ.get('GOVTRACKER_COMPRESSION', 'True') == 'True',
+    'MIN_SIZE': int(os.environ.get('GOVTRACKER_COMPRESSION_MIN_SIZE', 1024)),
+    'EXCLUDE_PATHS': ('/api/auth/',),
+}
+
+# Preloading done by govtracker.wsgi before uwsgi forks the workers
+API_WARMUP = {
+    'ENABLED': os.environ.get('GOVTRACKER_WARMUP', 'True') == 'True',
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'api.performance': {
+            'handlers': ['console'],
+            'level': 'WARNING' if TESTING else 'INFO',
+            'propagate': False,
+        },
+        'api.jobs': {
+            'handlers': ['console'],
+            'level': 'CRITICAL' if TESTING else 'INFO',
+            'propagate': False,
+        },
+        'api.audit': {
+            'handlers': ['console'],
+            'level': 'ERROR',
+            'propagate': False,
+        },
+    },
+}
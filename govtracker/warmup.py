@@ -0,0 +1,120 @@
+"""
+Warm up the process before uwsgi forks its workers.
+
+Without `lazy-apps`, uwsgi loads `govtracker.wsgi` once in the master and
+forks every worker from it. Whatever the master has imported, compiled or
+built by then is shared by the workers, copy-on-write, instead of being done
+again by each of them on its first requests.
+
+Nothing here may leave a connection open, since the workers would all
+inherit the same socket.
+"""
+import gc
+from importlib import import_module
+
+from django.apps import apps
+from django.conf import settings
+from django.utils.module_loading import module_has_submodule
+
+# Modules of the installed apps that are otherwise only imported on first use
+APP_MODULES = (
+    'models', 'admin', 'forms', 'signals', 'urls', 'views', 'serializers', 'authentication',
+    'permissions', 'renderers', 'parsers', 'throttling', 'filters', 'pagination', 'middleware',
+)
+
+def import_app_modules():
+    for app_config in apps.get_app_configs():
+        for name in APP_MODULES:
+            if module_has_submodule(app_config.module, name):
+                import_module('%s.%s' % (app_config.name, name))
+
+def load_api_settings():
+    """
+    Import every class and handler named in the DRF and JWT settings.
+    """
+    from django.contrib.auth.hashers import get_hashers
+    from rest_framework.settings import api_settings, DEFAULTS
+    from rest_framework_jwt.settings import api_settings as jwt_settings, DEFAULTS as JWT_DEFAULTS
+
+    for name in DEFAULTS:
+        getattr(api_settings, name)
+    for name in JWT_DEFAULTS:
+        getattr(jwt_settings, name)
+    get_hashers()
+
+def iter_views(resolver):
+    from django.core.urlresolvers import RegexURLResolver
+
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, RegexURLResolver):
+            for view in iter_views(pattern):
+                yield view
+        else:
+            yield pattern.callback
+
+def compile_urls():
+    """
+    Compile every URL pattern, import the views they name and build the
+    reverse lookups of every resolver.
+    """
+    from django.core.urlresolvers import RegexURLResolver, get_resolver
+
+    def populate(resolver):
+        resolver.regex
+        resolver.reverse_dict, resolver.namespace_dict, resolver.app_dict
+        for pattern in resolver.url_patterns:
+            pattern.regex
+            if isinstance(pattern, RegexURLResolver):
+                populate(pattern)
+
+    populate(get_resolver(None))
+
+def build_serializers():
+    """
+    Build the fields, and the representation plans, of the serializers of
+    every DRF view.
+    """
+    from django.core.urlresolvers import get_resolver
+
+    serializer_classes = set()
+    for view in iter_views(get_resolver(None)):
+        view_class = getattr(view, 'cls', None)
+        for name in ('serializer_class', 'serializer_create_class'):
+            serializer_class = getattr(view_class, name, None)
+            if serializer_class is not None:
+                serializer_classes.add(serializer_class)
+
+    for serializer_class in serializer_classes:
+        serializer = serializer_class()
+        serializer.fields
+        if hasattr(serializer, 'get_representation_plan'):
+            serializer.get_representation_plan()
+
+def prepare_databases():
+    """
+    Import the database backends and create their connection objects,
+    without connecting.
+    """
+    from django.db import connections
+
+    for alias in connections:
+        connection = connections[alias]
+        connection.get_connection_params()
+    # In case anything above ran a query
+    connections.close_all()
+
+def warm_up():
+    options = getattr(settings, 'API_WARMUP', {})
+    if not options.get('ENABLED', True):
+        return
+    import_app_modules()
+    load_api_settings()
+    compile_urls()
+    build_serializers()
+    prepare_databases()
+
+    # Keep the collector of each worker from writing to, and so copying, the
+    # pages of everything loaded so far. gc.freeze() is new in Python 3.7.
+    gc.collect()
+    if hasattr(gc, 'freeze'):
+        gc.freeze()
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "govtracker.settings")
 
 application = get_wsgi_application()
+
+# uwsgi imports this module in the master, so this runs once, before the
+# workers are forked
+from govtracker.warmup import warm_up
+warm_up()